@@ -1,10 +1,11 @@
 import numpy as np
-from src.fpeqs import (
-    different_alpha_observables_fpeqs,
-    var_func_L2,
-    var_hat_func_numerical_loss_single_noise,
+from src.fpeqs import different_alpha_observables_fpeqs
+from src.fpeqs_L2 import var_func_L2
+from src.fpeqs_numerical import var_hat_func_numerical_loss_single_noise
+from src.numerical_functions import (
+    precompute_proximals_loss_double_quad_table,
+    numerical_loss_grid_context,
 )
-from src.numerical_functions import precompute_proximals_loss_double_quad_grid
 
 if __name__ == "__main__":
 
@@ -16,7 +17,9 @@ if __name__ == "__main__":
 
     var_hat_kwargs = {
         "delta": delta_small,
-        "precompute_proximal_func": precompute_proximals_loss_double_quad_grid,
+        "precompute_proximal_func": precompute_proximals_loss_double_quad_table,
+        # the Romberg grid only depends on delta, it is built once for the sweep
+        "grid_context": numerical_loss_grid_context(delta_small),
         "loss_args": {"width": width},
     }
 
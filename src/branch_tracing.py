@@ -0,0 +1,217 @@
+import numpy as np
+import src.fpeqs as fp
+
+INITIAL_ARCLENGTH_STEP = 0.05
+MIN_ARCLENGTH_STEP = 1e-6
+MAX_ARCLENGTH_STEP = 0.5
+STEP_GROW = 1.5
+STEP_SHRINK = 0.5
+MAX_CORRECTOR_STEPS = 10
+FAST_CORRECTOR_STEPS = 3
+SLOW_CORRECTOR_STEPS = 6
+FD_STEP = 1e-7
+MAX_BRANCH_POINTS = 10000
+
+# The branches are traced in y = (m, log(q), log(sigma), log(alpha)), on the
+# curve F(y) = var_func(var_hat_func(m, q, sigma, alpha)) - (m, q, sigma) = 0.
+# The logarithms keep q and sigma positive and make the arclength insensitive
+# to the scale of q and sigma, which span several decades along a sweep.
+
+
+def _residual(var_func, var_hat_func, reg_param, y, var_hat_kwargs):
+    m, q, sigma, alpha = y[0], np.exp(y[1]), np.exp(y[2]), np.exp(y[3])
+    m_hat, q_hat, sigma_hat = var_hat_func(m, q, sigma, alpha, **var_hat_kwargs)
+    return np.array(var_func(m_hat, q_hat, sigma_hat, reg_param), dtype=float) - [
+        m,
+        q,
+        sigma,
+    ]
+
+
+def _extended_jacobian(var_func, var_hat_func, reg_param, y, f, var_hat_kwargs):
+    jacobian = np.empty((3, 4))
+    for idx in range(4):
+        step = FD_STEP * max(1.0, np.abs(y[idx]))
+        y_step = y.copy()
+        y_step[idx] += step
+        jacobian[:, idx] = (
+            _residual(var_func, var_hat_func, reg_param, y_step, var_hat_kwargs) - f
+        ) / step
+    return jacobian
+
+
+def _tangent(jacobian, previous_tangent):
+    # null vector of the 3 x 4 jacobian, oriented as the previous tangent
+    tangent = np.linalg.svd(jacobian)[2][-1]
+    if np.dot(tangent, previous_tangent) < 0:
+        tangent = -tangent
+    return tangent
+
+
+def _stable(jacobian, y):
+    # the undamped map x -> var_func(var_hat_func(x)) contracts around the
+    # point, then every damped iteration with a blend in (0, 1] does as well,
+    # whatever blending state_equations picks. The jacobian in (m, q, sigma) is
+    # recovered from the one in the logarithms.
+    jacobian_x = jacobian[:, :3] / np.array([1.0, np.exp(y[1]), np.exp(y[2])])
+    eigenvalues = np.linalg.eigvals(np.eye(3) + jacobian_x)
+    return np.max(np.abs(eigenvalues)) < 1
+
+
+def _correct(
+    var_func, var_hat_func, reg_param, y_pred, tangent, jacobian, var_hat_kwargs
+):
+    # Newton on F(y) = 0 and tangent . (y - y_pred) = 0, with Broyden updates
+    # of the jacobian of the last point
+    jacobian = jacobian.copy()
+    y = y_pred.copy()
+    f = None
+    n_evaluations = 0
+
+    for n_steps in range(MAX_CORRECTOR_STEPS):
+        f_new = _residual(var_func, var_hat_func, reg_param, y, var_hat_kwargs)
+        n_evaluations += 1
+        if not np.all(np.isfinite(f_new)):
+            return None, n_steps, n_evaluations
+        if f is not None:
+            jacobian += np.outer(f_new - f - jacobian @ s, s) / np.dot(s, s)
+        f = f_new
+
+        if np.max(np.abs(f)) <= fp.TOL_FPE:
+            return y, n_steps, n_evaluations
+
+        try:
+            s = np.linalg.solve(
+                np.vstack([jacobian, tangent]),
+                -np.append(f, np.dot(tangent, y - y_pred)),
+            )
+        except np.linalg.LinAlgError:
+            return None, n_steps, n_evaluations
+        y = y + s
+
+    return None, MAX_CORRECTOR_STEPS, n_evaluations
+
+
+def _split_branches(points, stable, fold_indices):
+    branches = []
+    for start, end in zip([0] + fold_indices, fold_indices + [len(points) - 1]):
+        branches.append(
+            {
+                "alphas": np.exp(points[start : end + 1, 3]),
+                "m": points[start : end + 1, 0],
+                "q": np.exp(points[start : end + 1, 1]),
+                "sigma": np.exp(points[start : end + 1, 2]),
+                "stable": stable[start : end + 1],
+            }
+        )
+    return branches
+
+
+def trace_branches(
+    var_func,
+    var_hat_func,
+    alpha_1=0.01,
+    alpha_2=100,
+    reg_param=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+    ds=INITIAL_ARCLENGTH_STEP,
+    max_points=MAX_BRANCH_POINTS,
+):
+    # Pseudo-arclength continuation in log(alpha) from the fixed point found at
+    # alpha_1 until the curve leaves [alpha_1, alpha_2], the last point is put
+    # back on the boundary it crossed. The curve is split at the folds, where
+    # d log(alpha) / ds changes sign, each piece is a branch.
+    t_1, t_2 = np.log(alpha_1), np.log(alpha_2)
+
+    (m, q, sigma), info = fp.state_equations(
+        var_func,
+        var_hat_func,
+        reg_param,
+        alpha_1,
+        initial_cond,
+        var_hat_kwargs,
+        full_output=True,
+    )
+    if info["status"] != "converged":
+        raise ValueError(
+            "The fixed point at alpha_1 = {} {}, no branch to trace.".format(
+                alpha_1, info["status"]
+            )
+        )
+    y = np.array([m, np.log(q), np.log(sigma), t_1])
+    f = _residual(var_func, var_hat_func, reg_param, y, var_hat_kwargs)
+    jacobian = _extended_jacobian(
+        var_func, var_hat_func, reg_param, y, f, var_hat_kwargs
+    )
+    tangent = _tangent(jacobian, np.array([0.0, 0.0, 0.0, 1.0]))
+    n_evaluations = 5
+
+    points, stable = [y], [_stable(jacobian, y)]
+    fold_indices, folds = [], []
+    on_boundary = False
+
+    while not on_boundary and len(points) < max_points:
+        y_pred = y + ds * tangent
+        y_new, n_steps, n_corrector = _correct(
+            var_func, var_hat_func, reg_param, y_pred, tangent, jacobian, var_hat_kwargs
+        )
+        n_evaluations += n_corrector
+
+        if y_new is None:
+            ds *= STEP_SHRINK
+            if ds < MIN_ARCLENGTH_STEP:
+                break
+            continue
+
+        if not t_1 <= y_new[3] <= t_2:
+            # corrector from the secant point on the boundary, with log(alpha) fixed
+            t_end = t_1 if y_new[3] < t_1 else t_2
+            weight = (t_end - y[3]) / (y_new[3] - y[3])
+            y_new, _, n_corrector = _correct(
+                var_func,
+                var_hat_func,
+                reg_param,
+                y + weight * (y_new - y),
+                np.array([0.0, 0.0, 0.0, 1.0]),
+                jacobian,
+                var_hat_kwargs,
+            )
+            n_evaluations += n_corrector
+            if y_new is None:
+                break
+            y_new[3] = t_end
+            on_boundary = True
+
+        f_new = _residual(var_func, var_hat_func, reg_param, y_new, var_hat_kwargs)
+        jacobian = _extended_jacobian(
+            var_func, var_hat_func, reg_param, y_new, f_new, var_hat_kwargs
+        )
+        new_tangent = _tangent(jacobian, tangent)
+        n_evaluations += 5
+
+        if new_tangent[3] * tangent[3] < 0:
+            weight = tangent[3] / (tangent[3] - new_tangent[3])
+            folds.append(np.exp(y[3] + weight * (y_new[3] - y[3])))
+            fold_indices.append(len(points))
+
+        y, tangent = y_new, new_tangent
+        points.append(y)
+        stable.append(_stable(jacobian, y))
+
+        if n_steps <= FAST_CORRECTOR_STEPS:
+            ds = min(STEP_GROW * ds, MAX_ARCLENGTH_STEP)
+        elif n_steps > SLOW_CORRECTOR_STEPS:
+            ds = max(STEP_SHRINK * ds, MIN_ARCLENGTH_STEP)
+
+    points, stable = np.array(points), np.array(stable)
+    return {
+        "alphas": np.exp(points[:, 3]),
+        "m": points[:, 0],
+        "q": np.exp(points[:, 1]),
+        "sigma": np.exp(points[:, 2]),
+        "stable": stable,
+        "folds": np.array(folds),
+        "branches": _split_branches(points, stable, fold_indices),
+        "n_evaluations": n_evaluations,
+    }
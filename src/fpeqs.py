@@ -1,6 +1,23 @@
 import numpy as np
+from inspect import signature
+from numba import njit, prange
+from time import time, perf_counter
+from src.integration_utils import integrand_evaluations
+from src.fpeqs_L2 import (
+    var_func_L2,
+    var_hat_func_L2_single_noise,
+    var_hat_func_L2_double_noise,
+    var_hat_func_L2_decorrelated_noise,
+    fixed_point_L2_single_noise,
+    fixed_point_L2_double_noise,
+    fixed_point_L2_decorrelated_noise,
+)
+from src.fpeqs_BO import (
+    var_func_BO,
+    var_hat_func_BO_single_noise,
+    fixed_point_BO_single_noise,
+)
 
-# from numba import njit
 # from math import erfc  # , erf
 #  import src.numerical_functions as numfun
 # from scipy.special import log_ndtr, erf
@@ -12,25 +29,135 @@ from tqdm.auto import tqdm
 
 BLEND = 0.9
 TOL_FPE = 1e-9
+ANDERSON_DEPTH = 3
+ANDERSON_RESTART = 2.0
+BROYDEN_FD_STEP = 1e-7
+LINE_SEARCH_STEPS = 8
+LINE_SEARCH_DECREASE = 1e-4
+MAX_ITER_FPE = 100000
+MAX_TIME_FPE = np.inf
+RTOL_FPE = 0.0
+DIVERGENCE_FACTOR = 1e8
+BLEND_MIN = 0.05
+BLEND_MAX = 1.0
+BLEND_SHRINK = 0.5
+BLEND_GROW = 1.1
+SOLVER_METHODS = ["damped", "anderson", "broyden"]
+SOLVER_STATUSES = ["converged", "stalled", "diverged"]
+TELEMETRY_FIELDS = [
+    "n_iter",
+    "n_evaluations",
+    "time_var_hat_func",
+    "time_var_func",
+    "n_integrand_evals",
+]
+CONTINUATION_DIRECTIONS = ["forward", "backward"]
+ADAPTIVE_INITIAL_POINTS = 9
+ADAPTIVE_MAX_POINTS = 200
+ADAPTIVE_TOL = 1e-3
+ADAPTIVE_MIN_LOG_STEP = 1e-3
+ADAPTIVE_ROUND_FRACTION = 0.1
+MULTI_START_POINTS = 16
+MULTI_START_CLUSTER_TOL = 1e-5
 
+# channels whose fixed point is known in closed form, the solvers take
+# (alpha, reg_param) and the channel parameters in the order of var_hat_func
+DIRECT_SOLVERS = {
+    (var_func_L2, var_hat_func_L2_single_noise): fixed_point_L2_single_noise,
+    (var_func_L2, var_hat_func_L2_double_noise): fixed_point_L2_double_noise,
+    (
+        var_func_L2,
+        var_hat_func_L2_decorrelated_noise,
+    ): fixed_point_L2_decorrelated_noise,
+    (var_func_BO, var_hat_func_BO_single_noise): fixed_point_BO_single_noise,
+}
 
-def state_equations(var_func, var_hat_func, reg_param, alpha, init, var_hat_kwargs):
+
+def _fixed_point_map(var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs):
+    m_hat, q_hat, sigma_hat = var_hat_func(x[0], x[1], x[2], alpha, **var_hat_kwargs)
+    return np.array(var_func(m_hat, q_hat, sigma_hat, reg_param), dtype=float)
+
+
+def _fixed_point_residual(var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs):
+    return (
+        _fixed_point_map(var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs)
+        - x
+    )
+
+
+def _in_domain(x):
+    return np.all(np.isfinite(x)) and x[1] > 0 and x[2] > 0
+
+
+def _step_converged(g, step, atol, rtol):
+    return np.all(np.abs(step) <= atol + rtol * np.abs(g))
+
+
+def _budget_exhausted(n_evaluations, start_time, max_iter, max_time):
+    return n_evaluations >= max_iter or time() - start_time > max_time
+
+
+def _diverging(err, err_min):
+    return not np.isfinite(err) or err > DIVERGENCE_FACTOR * err_min
+
+
+def _timed(func, timings, key):
+    def timed_func(*args, **kwargs):
+        start_time = perf_counter()
+        out = func(*args, **kwargs)
+        timings[key] += perf_counter() - start_time
+        return out
+
+    return timed_func
+
+
+def _damped_state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_kwargs,
+    max_iter=MAX_ITER_FPE,
+    max_time=MAX_TIME_FPE,
+    atol=TOL_FPE,
+    rtol=RTOL_FPE,
+    adaptive_blend=True,
+):
     m, q, sigma = init[0], init[1], init[2]
-    err = 1.0
+    blend = BLEND
+    err, err_min = 1.0, np.inf
+    prev_step = None
+    residuals = []
+    n_evaluations = 0
+    start_time = time()
 
-    #  print("alpha : {:.3f} a : {:.9f} reg_par : {:.7f}".format(alpha, var_hat_kwargs["a"], reg_param))
-    while err > TOL_FPE:
+    #  print("alpha : {:.3f} a : {:.9f} reg_par : {:.7f}".format(alpha, var_hat_kwargs["a"], reg_param))
+    while True:
         m_hat, q_hat, sigma_hat = var_hat_func(m, q, sigma, alpha, **var_hat_kwargs)
+        n_evaluations += 1
 
         temp_m, temp_q, temp_sigma = m, q, sigma
 
         m, q, sigma = var_func(m_hat, q_hat, sigma_hat, reg_param)
 
-        err = np.max(np.abs([(temp_m - m), (temp_q - q), (temp_sigma - sigma)]))
+        step = np.array([m - temp_m, q - temp_q, sigma - temp_sigma])
+        prev_err, err = err, np.max(np.abs(step))
+        residuals.append(err)
 
-        m = BLEND * m + (1 - BLEND) * temp_m
-        q = BLEND * q + (1 - BLEND) * temp_q
-        sigma = BLEND * sigma + (1 - BLEND) * temp_sigma
+        if adaptive_blend and prev_step is not None:
+            # shrink the blending on oscillations, grow it back on monotone progress
+            if np.dot(step, prev_step) < 0:
+                blend = max(BLEND_MIN, BLEND_SHRINK * blend)
+            elif err < prev_err:
+                blend = min(BLEND_MAX, BLEND_GROW * blend)
+        prev_step = step
+
+        new_m, new_q, new_sigma = m, q, sigma
+
+        m = blend * m + (1 - blend) * temp_m
+        q = blend * q + (1 - blend) * temp_q
+        sigma = blend * sigma + (1 - blend) * temp_sigma
 
         # print(
         #     "  err: {:.8f} alpha : {:.2f} m = {:.9f}; q = {:.9f}; \[CapitalSigma] = {:.9f}".format(
@@ -38,21 +165,526 @@ def state_equations(var_func, var_hat_func, reg_param, alpha, init, var_hat_kwar
         #     )
         # )
 
+        if _diverging(err, err_min):
+            status = "diverged"
+            break
+        if _step_converged(np.array([new_m, new_q, new_sigma]), step, atol, rtol):
+            status = "converged"
+            break
+        if _budget_exhausted(n_evaluations, start_time, max_iter, max_time):
+            status = "stalled"
+            break
+        err_min = min(err_min, err)
+
+    return (m, q, sigma), {
+        "status": status,
+        "n_iter": n_evaluations,
+        "n_evaluations": n_evaluations,
+        "err": err,
+        "residuals": residuals,
+    }
+
+
+def _anderson_state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_kwargs,
+    depth,
+    max_iter=MAX_ITER_FPE,
+    max_time=MAX_TIME_FPE,
+    atol=TOL_FPE,
+    rtol=RTOL_FPE,
+):
+    # Anderson mixing (type II) on the map x -> var_func(var_hat_func(x)), the
+    # history is dropped and a plain damped step is taken whenever the residual
+    # grows or the extrapolated point leaves the domain q > 0, sigma > 0.
+    x = np.array([init[0], init[1], init[2]], dtype=float)
+    prev_g, prev_f = None, None
+    delta_gs, delta_fs = [], []
+    x_fallback = None
+    err, err_min = np.inf, np.inf
+    residuals = []
+    n_iter, n_evaluations = 0, 0
+    start_time = time()
+
+    while True:
+        if _budget_exhausted(n_evaluations, start_time, max_iter, max_time):
+            status = "stalled"
+            break
+        n_iter += 1
+
+        g = _fixed_point_map(
+            var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs
+        )
+        n_evaluations += 1
+
+        if not np.all(np.isfinite(g)) and x_fallback is not None:
+            # the extrapolated point is outside the domain of the channel
+            x, x_fallback = x_fallback, None
+            prev_g, prev_f = None, None
+            delta_gs, delta_fs = [], []
+            continue
+
+        f = g - x
+
+        err = np.max(np.abs(f))
+        residuals.append(err)
+        if _diverging(err, err_min):
+            status = "diverged"
+            x = g
+            break
+        if _step_converged(g, f, atol, rtol):
+            status = "converged"
+            x = BLEND * g + (1 - BLEND) * x
+            break
+        err_min = min(err_min, err)
+
+        if prev_f is not None:
+            if np.max(np.abs(f)) > ANDERSON_RESTART * np.max(np.abs(prev_f)):
+                delta_gs, delta_fs = [], []
+            else:
+                delta_gs.append(g - prev_g)
+                delta_fs.append(f - prev_f)
+                if len(delta_fs) > depth:
+                    delta_gs.pop(0)
+                    delta_fs.pop(0)
+
+        prev_g, prev_f = g, f
+
+        x_damped = BLEND * g + (1 - BLEND) * x
+        if len(delta_fs) == 0:
+            x, x_fallback = x_damped, None
+            continue
+
+        delta_g = np.array(delta_gs).T
+        delta_f = np.array(delta_fs).T
+        gamma = np.linalg.lstsq(delta_f, f, rcond=None)[0]
+
+        x_anderson = BLEND * (g - delta_g @ gamma) + (1 - BLEND) * (
+            x - (delta_g - delta_f) @ gamma
+        )
+
+        if _in_domain(x_anderson):
+            x, x_fallback = x_anderson, x_damped
+        else:
+            delta_gs, delta_fs = [], []
+            x, x_fallback = x_damped, None
+
+    return (x[0], x[1], x[2]), {
+        "status": status,
+        "n_iter": n_iter,
+        "n_evaluations": n_evaluations,
+        "err": err,
+        "residuals": residuals,
+    }
+
+
+def _finite_difference_jacobian(
+    var_func, var_hat_func, reg_param, alpha, x, f, var_hat_kwargs
+):
+    jacobian = np.empty((3, 3))
+    for idx in range(3):
+        step = BROYDEN_FD_STEP * max(1.0, np.abs(x[idx]))
+        if idx > 0 and x[idx] - step <= 0:
+            step = -step
+        x_step = x.copy()
+        x_step[idx] += step
+        f_step = _fixed_point_residual(
+            var_func, var_hat_func, reg_param, alpha, x_step, var_hat_kwargs
+        )
+        jacobian[:, idx] = (f_step - f) / step
+    return jacobian
+
+
+def _broyden_state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_kwargs,
+    max_iter=MAX_ITER_FPE,
+    max_time=MAX_TIME_FPE,
+    atol=TOL_FPE,
+    rtol=RTOL_FPE,
+):
+    # Quasi-Newton solve of F(x) = var_func(var_hat_func(x)) - x = 0. The
+    # Jacobian starts from finite differences and gets rank-one Broyden updates,
+    # the Newton direction is backtracked on |F|. When no step along it
+    # decreases the residual the solver falls back to damped steps, doubling
+    # their number at every failure, and rebuilds the Jacobian afterwards.
+    x = np.array([init[0], init[1], init[2]], dtype=float)
+    f = _fixed_point_residual(
+        var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs
+    )
+    n_evaluations = 1
+    jacobian = None
+    fallback_steps = 1
+    damped_steps_left = 0
+    err_min = np.inf
+    residuals = []
+    n_iter = 0
+    start_time = time()
+
+    while True:
+        err = np.max(np.abs(f))
+        residuals.append(err)
+        if _diverging(err, err_min):
+            status = "diverged"
+            break
+        if _step_converged(x + f, f, atol, rtol):
+            status = "converged"
+            x = x + BLEND * f
+            break
+        if _budget_exhausted(n_evaluations, start_time, max_iter, max_time):
+            status = "stalled"
+            break
+        err_min = min(err_min, err)
+        n_iter += 1
+
+        if damped_steps_left > 0:
+            x = x + BLEND * f
+            f = _fixed_point_residual(
+                var_func, var_hat_func, reg_param, alpha, x, var_hat_kwargs
+            )
+            n_evaluations += 1
+            damped_steps_left -= 1
+            continue
+
+        if jacobian is None:
+            jacobian = _finite_difference_jacobian(
+                var_func, var_hat_func, reg_param, alpha, x, f, var_hat_kwargs
+            )
+            n_evaluations += 3
+
+        try:
+            direction = -np.linalg.solve(jacobian, f)
+        except np.linalg.LinAlgError:
+            direction = np.full(3, np.nan)
+
+        accepted = False
+        if np.all(np.isfinite(direction)):
+            step_size = 1.0
+            for _ in range(LINE_SEARCH_STEPS):
+                x_new = x + step_size * direction
+                if _in_domain(x_new):
+                    f_new = _fixed_point_residual(
+                        var_func, var_hat_func, reg_param, alpha, x_new, var_hat_kwargs
+                    )
+                    n_evaluations += 1
+                    if np.all(np.isfinite(f_new)) and np.linalg.norm(f_new) < (
+                        1 - LINE_SEARCH_DECREASE * step_size
+                    ) * np.linalg.norm(f):
+                        accepted = True
+                        break
+                step_size *= 0.5
+
+        if accepted:
+            s = x_new - x
+            jacobian += np.outer(f_new - f - jacobian @ s, s) / np.dot(s, s)
+            x, f = x_new, f_new
+        else:
+            jacobian = None
+            damped_steps_left = fallback_steps
+            fallback_steps *= 2
+
+    return (x[0], x[1], x[2]), {
+        "status": status,
+        "n_iter": n_iter,
+        "n_evaluations": n_evaluations,
+        "err": err,
+        "residuals": residuals,
+    }
+
+
+def direct_state_equations(
+    var_func, var_hat_func, reg_param, alpha, var_hat_kwargs, full_output=False
+):
+    direct_solver = DIRECT_SOLVERS.get((var_func, var_hat_func))
+    if direct_solver is None:
+        raise ValueError("No direct solver for this pair of var_func, var_hat_func.")
+
+    start_time = perf_counter()
+    fixed_point = direct_solver(
+        np.asarray(alpha, dtype=float).item(),
+        np.asarray(reg_param, dtype=float).item(),
+        *var_hat_args_from_kwargs(var_hat_func, var_hat_kwargs),
+    )
+
+    if full_output:
+        info = {
+            "status": "converged" if np.all(np.isfinite(fixed_point)) else "diverged",
+            "n_iter": 0,
+            "n_evaluations": 0,
+            "err": 0.0,
+            "residuals": [],
+            "time_var_hat_func": perf_counter() - start_time,
+            "time_var_func": 0.0,
+            "n_integrand_evals": 0,
+        }
+        return fixed_point, info
+    return fixed_point
+
+
+def state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_kwargs,
+    method="damped",
+    anderson_depth=ANDERSON_DEPTH,
+    max_iter=MAX_ITER_FPE,
+    max_time=MAX_TIME_FPE,
+    atol=TOL_FPE,
+    rtol=RTOL_FPE,
+    adaptive_blend=True,
+    full_output=False,
+    direct=True,
+):
+    # the channels in DIRECT_SOLVERS are solved in closed form unless direct is
+    # False, the iterative solvers below are used for all the others
+    if direct and (var_func, var_hat_func) in DIRECT_SOLVERS:
+        return direct_state_equations(
+            var_func, var_hat_func, reg_param, alpha, var_hat_kwargs, full_output
+        )
+
+    # atol and rtol are either scalars or one value per variable (m, q, sigma),
+    # a solve stops as "stalled" after max_iter evaluations or max_time seconds.
+    # With full_output the info dict also holds the residual trace, the time
+    # spent in var_hat_func and var_func and the integrand evaluations.
+    if full_output:
+        timings = {"time_var_hat_func": 0.0, "time_var_func": 0.0}
+        var_func = _timed(var_func, timings, "time_var_func")
+        var_hat_func = _timed(var_hat_func, timings, "time_var_hat_func")
+        start_integrand_evaluations = integrand_evaluations()
+
+    guard_kwargs = {
+        "max_iter": max_iter,
+        "max_time": max_time,
+        "atol": np.asarray(atol, dtype=float),
+        "rtol": np.asarray(rtol, dtype=float),
+    }
+
+    if method == "damped":
+        fixed_point, info = _damped_state_equations(
+            var_func,
+            var_hat_func,
+            reg_param,
+            alpha,
+            init,
+            var_hat_kwargs,
+            adaptive_blend=adaptive_blend,
+            **guard_kwargs,
+        )
+    elif method == "anderson":
+        fixed_point, info = _anderson_state_equations(
+            var_func,
+            var_hat_func,
+            reg_param,
+            alpha,
+            init,
+            var_hat_kwargs,
+            anderson_depth,
+            **guard_kwargs,
+        )
+    elif method == "broyden":
+        fixed_point, info = _broyden_state_equations(
+            var_func,
+            var_hat_func,
+            reg_param,
+            alpha,
+            init,
+            var_hat_kwargs,
+            **guard_kwargs,
+        )
+    else:
+        raise ValueError("method should be one of {}.".format(SOLVER_METHODS))
+
+    if full_output:
+        info.update(timings)
+        info["n_integrand_evals"] = (
+            integrand_evaluations() - start_integrand_evaluations
+        )
+        return fixed_point, info
+    return fixed_point
+
+
+def anderson_saved_evaluations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_kwargs,
+    anderson_depth=ANDERSON_DEPTH,
+):
+    _, damped_info = _damped_state_equations(
+        var_func, var_hat_func, reg_param, alpha, init, var_hat_kwargs
+    )
+    _, anderson_info = _anderson_state_equations(
+        var_func, var_hat_func, reg_param, alpha, init, var_hat_kwargs, anderson_depth
+    )
+    n_damped = damped_info["n_evaluations"]
+    n_anderson = anderson_info["n_evaluations"]
+    return n_damped, n_anderson, n_damped - n_anderson
+
+
+def collect_telemetry(infos):
+    # one row per solve, the residual traces are padded with nan
+    telemetry = {"status": np.array([info["status"] for info in infos])}
+    for key in TELEMETRY_FIELDS:
+        telemetry[key] = np.array([info[key] for info in infos])
+
+    n_residuals = max([len(info["residuals"]) for info in infos] + [0])
+    telemetry["residuals"] = np.full((len(infos), n_residuals), np.nan)
+    for idx, info in enumerate(infos):
+        telemetry["residuals"][idx, : len(info["residuals"])] = info["residuals"]
+
+    return telemetry
+
+
+def _var_hat_param_names(var_hat_func):
+    py_func = getattr(var_hat_func, "py_func", var_hat_func)
+    return list(signature(py_func).parameters)[4:]
+
+
+def var_hat_args_from_kwargs(var_hat_func, var_hat_kwargs):
+    # the jitted solvers take the channel parameters as a tuple of floats in the
+    # order of the var_hat_func signature, after (m, q, sigma, alpha)
+    return tuple(
+        float(var_hat_kwargs[name]) for name in _var_hat_param_names(var_hat_func)
+    )
+
+
+@njit(error_model="numpy")
+def _jit_status(err, err_min, n_iter, max_iter):
+    # index in SOLVER_STATUSES, -1 while the solve is still running
+    if not np.isfinite(err) or err > DIVERGENCE_FACTOR * err_min:
+        return 2
+    if err <= TOL_FPE:
+        return 0
+    if n_iter >= max_iter:
+        return 1
+    return -1
+
+
+@njit(error_model="numpy")
+def _jit_state_equations(
+    var_func, var_hat_func, reg_param, alpha, init, var_hat_args, max_iter
+):
+    m, q, sigma = init[0], init[1], init[2]
+    err_min = np.inf
+    n_iter = 0
+    status = -1
+
+    while status < 0:
+        m_hat, q_hat, sigma_hat = var_hat_func(m, q, sigma, alpha, *var_hat_args)
+
+        temp_m, temp_q, temp_sigma = m, q, sigma
+
+        m, q, sigma = var_func(m_hat, q_hat, sigma_hat, reg_param)
+
+        err = max(abs(temp_m - m), abs(temp_q - q), abs(temp_sigma - sigma))
+
+        m = BLEND * m + (1 - BLEND) * temp_m
+        q = BLEND * q + (1 - BLEND) * temp_q
+        sigma = BLEND * sigma + (1 - BLEND) * temp_sigma
+        n_iter += 1
+
+        status = _jit_status(err, err_min, n_iter, max_iter)
+        err_min = min(err_min, err)
+
+    return m, q, sigma, status
+
+
+def jit_state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    init,
+    var_hat_args,
+    max_iter=MAX_ITER_FPE,
+    full_output=False,
+):
+    m, q, sigma, status = _jit_state_equations(
+        var_func,
+        var_hat_func,
+        float(reg_param),
+        float(alpha),
+        (float(init[0]), float(init[1]), float(init[2])),
+        tuple(float(v) for v in var_hat_args),
+        max_iter,
+    )
+    if full_output:
+        return (m, q, sigma), {"status": SOLVER_STATUSES[status]}
     return m, q, sigma
 
 
 def _find_fixed_point(
-    alpha, var_func, var_hat_func, reg_param, initial_cond, var_hat_kwargs
+    alpha,
+    var_func,
+    var_hat_func,
+    reg_param,
+    initial_cond,
+    var_hat_kwargs,
+    solver_kwargs={},
 ):
-    m, q, sigma = state_equations(
+    (m, q, sigma), info = state_equations(
         var_func,
         var_hat_func,
         reg_param=reg_param,
         alpha=alpha,
         init=initial_cond,
         var_hat_kwargs=var_hat_kwargs,
+        full_output=True,
+        **solver_kwargs,
     )
-    return m, q, sigma
+    return m, q, sigma, info
+
+
+def _continuation_fixed_points(
+    find_fixed_point, params, initial_cond, continuation="forward", predictor="secant"
+):
+    # walks the grid in order and starts each solve from the previous fixed
+    # point, or from its secant extrapolation in log(param) when it stays in
+    # the domain
+    if continuation == "forward":
+        order = range(len(params))
+    elif continuation == "backward":
+        order = reversed(range(len(params)))
+    else:
+        raise ValueError(
+            "continuation should be one of {}.".format(CONTINUATION_DIRECTIONS)
+        )
+
+    log_params = np.log(params)
+    results = [None] * len(params)
+    previous = []
+
+    for idx in tqdm(order, total=len(params)):
+        init = initial_cond
+        if len(previous) > 0:
+            init = previous[-1][1]
+        if predictor == "secant" and len(previous) > 1:
+            (t_0, x_0), (t_1, x_1) = previous
+            guess = x_1 + (x_1 - x_0) * (log_params[idx] - t_1) / (t_1 - t_0)
+            if _in_domain(guess):
+                init = guess
+
+        m, q, sigma, info = find_fixed_point(params[idx], list(init))
+        results[idx] = (m, q, sigma, info)
+        if info["status"] == "converged":
+            previous = (previous + [(log_params[idx], np.array([m, q, sigma]))])[-2:]
+        else:
+            previous = []
+
+    return results
 
 
 def no_parallel_different_alpha_observables_fpeqs(
@@ -65,6 +697,10 @@ def no_parallel_different_alpha_observables_fpeqs(
     reg_param=0.1,
     initial_cond=[0.6, 0.0, 0.0],
     var_hat_kwargs={},
+    solver_kwargs={},
+    continuation=None,
+    predictor="secant",
+    full_output=False,
 ):
     n_observables = len(funs)
     alphas = np.logspace(
@@ -73,10 +709,33 @@ def no_parallel_different_alpha_observables_fpeqs(
     out_values = np.empty((n_observables, n_alpha_points))
     results = [None] * len(alphas)
 
-    for idx, a in enumerate(tqdm(alphas)):
-        results[idx] = _find_fixed_point(
-            a, var_func, var_hat_func, reg_param, initial_cond, var_hat_kwargs
+    if continuation is not None:
+        results = _continuation_fixed_points(
+            lambda a, init: _find_fixed_point(
+                a,
+                var_func,
+                var_hat_func,
+                reg_param,
+                init,
+                var_hat_kwargs,
+                solver_kwargs,
+            ),
+            alphas,
+            initial_cond,
+            continuation=continuation,
+            predictor=predictor,
         )
+    else:
+        for idx, a in enumerate(tqdm(alphas)):
+            results[idx] = _find_fixed_point(
+                a,
+                var_func,
+                var_hat_func,
+                reg_param,
+                initial_cond,
+                var_hat_kwargs,
+                solver_kwargs,
+            )
     # inputs = [
     #     (a, var_func, var_hat_func, reg_param, initial_cond, var_hat_kwargs)
     #     for a in alphas
@@ -85,12 +744,14 @@ def no_parallel_different_alpha_observables_fpeqs(
     # with Pool() as pool:
     #     results = pool.starmap(_find_fixed_point, inputs)
 
-    for idx, (m, q, sigma) in enumerate(results):
+    for idx, (m, q, sigma, _) in enumerate(results):
         fixed_point_sols = {"m": m, "q": q, "sigma": sigma}
         for jdx, f in enumerate(funs):
             out_values[jdx, idx] = f(**fixed_point_sols)
 
     out_list = [out_values[idx, :] for idx in range(len(funs))]
+    if full_output:
+        return alphas, out_list, collect_telemetry([res[3] for res in results])
     return alphas, out_list
 
 
@@ -104,6 +765,7 @@ def MPI_different_alpha_observables_fpeqs(
     reg_param=0.1,
     initial_cond=[0.6, 0.0, 0.0],
     var_hat_kwargs={},
+    solver_kwargs={},
 ):
     comm = MPI.COMM_WORLD
     i = comm.Get_rank()
@@ -116,8 +778,14 @@ def MPI_different_alpha_observables_fpeqs(
     alpha = alphas[i]
     out_values = np.empty((n_observables, n_alpha_points))
 
-    m, q, sigma = _find_fixed_point(
-        alpha, var_func, var_hat_func, reg_param, initial_cond, var_hat_kwargs
+    m, q, sigma, _ = _find_fixed_point(
+        alpha,
+        var_func,
+        var_hat_func,
+        reg_param,
+        initial_cond,
+        var_hat_kwargs,
+        solver_kwargs,
     )
 
     ms = np.empty(pool_size)
@@ -160,6 +828,10 @@ def different_alpha_observables_fpeqs(
     reg_param=0.1,
     initial_cond=[0.6, 0.0, 0.0],
     var_hat_kwargs={},
+    solver_kwargs={},
+    continuation=None,
+    predictor="secant",
+    full_output=False,
 ):
     n_observables = len(funs)
     alphas = np.logspace(
@@ -167,20 +839,48 @@ def different_alpha_observables_fpeqs(
     )
     out_values = np.empty((n_observables, n_alpha_points))
 
-    inputs = [
-        (a, var_func, var_hat_func, reg_param, initial_cond, var_hat_kwargs)
-        for a in alphas
-    ]
+    if continuation is not None:
+        # the points depend on each other, so the grid is walked serially
+        results = _continuation_fixed_points(
+            lambda a, init: _find_fixed_point(
+                a,
+                var_func,
+                var_hat_func,
+                reg_param,
+                init,
+                var_hat_kwargs,
+                solver_kwargs,
+            ),
+            alphas,
+            initial_cond,
+            continuation=continuation,
+            predictor=predictor,
+        )
+    else:
+        inputs = [
+            (
+                a,
+                var_func,
+                var_hat_func,
+                reg_param,
+                initial_cond,
+                var_hat_kwargs,
+                solver_kwargs,
+            )
+            for a in alphas
+        ]
 
-    with Pool() as pool:
-        results = pool.starmap(_find_fixed_point, inputs)
+        with Pool() as pool:
+            results = pool.starmap(_find_fixed_point, inputs)
 
-    for idx, (m, q, sigma) in enumerate(results):
+    for idx, (m, q, sigma, _) in enumerate(results):
         fixed_point_sols = {"m": m, "q": q, "sigma": sigma}
         for jdx, f in enumerate(funs):
             out_values[jdx, idx] = f(**fixed_point_sols)
 
     out_list = [out_values[idx, :] for idx in range(len(funs))]
+    if full_output:
+        return alphas, out_list, collect_telemetry([res[3] for res in results])
     return alphas, out_list
 
 
@@ -194,6 +894,10 @@ def different_reg_param_gen_error(
     alpha=0.1,
     initial_cond=[0.6, 0.0, 0.0],
     var_hat_kwargs={},
+    solver_kwargs={},
+    continuation=None,
+    predictor="secant",
+    full_output=False,
 ):
     n_observables = len(funs)
     reg_params = np.logspace(
@@ -203,18 +907,616 @@ def different_reg_param_gen_error(
     )
     out_values = np.empty((n_observables, n_reg_param_points))
 
-    inputs = [
-        (alpha, var_func, var_hat_func, rp, initial_cond, var_hat_kwargs)
-        for rp in reg_params
-    ]
+    if continuation is not None:
+        # the points depend on each other, so the grid is walked serially
+        results = _continuation_fixed_points(
+            lambda rp, init: _find_fixed_point(
+                alpha, var_func, var_hat_func, rp, init, var_hat_kwargs, solver_kwargs
+            ),
+            reg_params,
+            initial_cond,
+            continuation=continuation,
+            predictor=predictor,
+        )
+    else:
+        inputs = [
+            (
+                alpha,
+                var_func,
+                var_hat_func,
+                rp,
+                initial_cond,
+                var_hat_kwargs,
+                solver_kwargs,
+            )
+            for rp in reg_params
+        ]
+
+        with Pool() as pool:
+            results = pool.starmap(_find_fixed_point, inputs)
+
+    for idx, (m, q, sigma, _) in enumerate(results):
+        fixed_point_sols = {"m": m, "q": q, "sigma": sigma}
+        for jdx, f in enumerate(funs):
+            out_values[jdx, idx] = f(**fixed_point_sols)
+
+    out_list = [out_values[idx, :] for idx in range(len(funs))]
+    if full_output:
+        return reg_params, out_list, collect_telemetry([res[3] for res in results])
+    return reg_params, out_list
+
 
-    with Pool() as pool:
-        results = pool.starmap(_find_fixed_point, inputs)
+@njit(error_model="numpy")
+def _jit_alphas_fixed_points(
+    var_func, var_hat_func, reg_param, alphas, init, var_hat_args, max_iter
+):
+    ms = np.empty(len(alphas))
+    qs = np.empty(len(alphas))
+    sigmas = np.empty(len(alphas))
+    statuses = np.empty(len(alphas), dtype=np.int64)
+    for idx in range(len(alphas)):
+        ms[idx], qs[idx], sigmas[idx], statuses[idx] = _jit_state_equations(
+            var_func,
+            var_hat_func,
+            reg_param,
+            alphas[idx],
+            init,
+            var_hat_args,
+            max_iter,
+        )
+    return ms, qs, sigmas, statuses
+
+
+def jit_different_alpha_observables_fpeqs(
+    var_func,
+    var_hat_func,
+    funs=[lambda m, q, sigma: 1 + q - 2 * m],
+    alpha_1=0.01,
+    alpha_2=100,
+    n_alpha_points=16,
+    reg_param=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+    max_iter=MAX_ITER_FPE,
+    full_output=False,
+):
+    n_observables = len(funs)
+    alphas = np.logspace(
+        np.log(alpha_1) / np.log(10), np.log(alpha_2) / np.log(10), n_alpha_points
+    )
+    out_values = np.empty((n_observables, n_alpha_points))
+
+    ms, qs, sigmas, statuses = _jit_alphas_fixed_points(
+        var_func,
+        var_hat_func,
+        float(reg_param),
+        alphas,
+        (float(initial_cond[0]), float(initial_cond[1]), float(initial_cond[2])),
+        var_hat_args_from_kwargs(var_hat_func, var_hat_kwargs),
+        max_iter,
+    )
 
-    for idx, (m, q, sigma) in enumerate(results):
+    for idx, (m, q, sigma) in enumerate(zip(ms, qs, sigmas)):
         fixed_point_sols = {"m": m, "q": q, "sigma": sigma}
         for jdx, f in enumerate(funs):
             out_values[jdx, idx] = f(**fixed_point_sols)
 
     out_list = [out_values[idx, :] for idx in range(len(funs))]
+    if full_output:
+        return alphas, out_list, {"status": np.array(SOLVER_STATUSES)[statuses]}
+    return alphas, out_list
+
+
+# ------------------
+# Batched fixed points
+# ------------------
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_0(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(m, q, sigma, alpha)
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_1(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(m, q, sigma, alpha, params[0][idx])
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_2(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(m, q, sigma, alpha, params[0][idx], params[1][idx])
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_3(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(
+        m, q, sigma, alpha, params[0][idx], params[1][idx], params[2][idx]
+    )
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_4(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(
+        m,
+        q,
+        sigma,
+        alpha,
+        params[0][idx],
+        params[1][idx],
+        params[2][idx],
+        params[3][idx],
+    )
+
+
+@njit(error_model="numpy")
+def _batch_hat_call_5(var_hat_func, m, q, sigma, alpha, params, idx):
+    return var_hat_func(
+        m,
+        q,
+        sigma,
+        alpha,
+        params[0][idx],
+        params[1][idx],
+        params[2][idx],
+        params[3][idx],
+        params[4][idx],
+    )
+
+
+_BATCH_HAT_CALLS = [
+    _batch_hat_call_0,
+    _batch_hat_call_1,
+    _batch_hat_call_2,
+    _batch_hat_call_3,
+    _batch_hat_call_4,
+    _batch_hat_call_5,
+]
+
+
+@njit(error_model="numpy")
+def _batch_fixed_point_sweeps(
+    var_func,
+    var_hat_func,
+    hat_call,
+    reg_params,
+    alphas,
+    params,
+    ms,
+    qs,
+    sigmas,
+    statuses,
+    max_iter,
+):
+    # one damped update of every point that is still running (status -1),
+    # repeated until each point has an index in SOLVER_STATUSES; the points
+    # of a sweep are independent, prange is a plain range in this serial build
+    err_mins = np.full(len(alphas), np.inf)
+    n_sweeps = 0
+
+    while np.any(statuses < 0):
+        for idx in prange(len(alphas)):
+            if statuses[idx] >= 0:
+                continue
+
+            m_hat, q_hat, sigma_hat = hat_call(
+                var_hat_func, ms[idx], qs[idx], sigmas[idx], alphas[idx], params, idx
+            )
+            m, q, sigma = var_func(m_hat, q_hat, sigma_hat, reg_params[idx])
+
+            err = max(abs(ms[idx] - m), abs(qs[idx] - q), abs(sigmas[idx] - sigma))
+
+            ms[idx] = BLEND * m + (1 - BLEND) * ms[idx]
+            qs[idx] = BLEND * q + (1 - BLEND) * qs[idx]
+            sigmas[idx] = BLEND * sigma + (1 - BLEND) * sigmas[idx]
+
+            statuses[idx] = _jit_status(err, err_mins[idx], n_sweeps + 1, max_iter)
+            err_mins[idx] = min(err_mins[idx], err)
+        n_sweeps += 1
+
+    return n_sweeps
+
+
+# the same sweeps on numba threads, only compiled when parallel=True is asked
+# for: once the threading layer has started, a fork (multiprocessing Pool)
+# leaves a child that hangs the parent at exit
+_parallel_batch_fixed_point_sweeps = njit(error_model="numpy", parallel=True)(
+    _batch_fixed_point_sweeps.py_func
+)
+
+
+def batch_state_equations(
+    var_func,
+    var_hat_func,
+    reg_params,
+    alphas,
+    init,
+    var_hat_kwargs,
+    max_iter=MAX_ITER_FPE,
+    full_output=False,
+    parallel=False,
+):
+    names = _var_hat_param_names(var_hat_func)
+    arrays = np.broadcast_arrays(
+        np.asarray(alphas, dtype=float),
+        np.asarray(reg_params, dtype=float),
+        *[np.asarray(var_hat_kwargs[name], dtype=float) for name in names],
+        *[np.asarray(init[idx], dtype=float) for idx in range(3)],
+    )
+    shape = arrays[0].shape
+    flat = [np.array(a, dtype=float).ravel() for a in arrays]
+
+    ms, qs, sigmas = flat[-3], flat[-2], flat[-1]
+    statuses = np.full(len(ms), -1, dtype=np.int64)
+
+    sweeps = (
+        _parallel_batch_fixed_point_sweeps if parallel else _batch_fixed_point_sweeps
+    )
+    sweeps(
+        var_func,
+        var_hat_func,
+        _BATCH_HAT_CALLS[len(names)],
+        flat[1],
+        flat[0],
+        tuple(flat[2:-3]),
+        ms,
+        qs,
+        sigmas,
+        statuses,
+        max_iter,
+    )
+
+    if full_output:
+        return (
+            ms.reshape(shape),
+            qs.reshape(shape),
+            sigmas.reshape(shape),
+            (statuses == 0).reshape(shape),
+        )
+    return ms.reshape(shape), qs.reshape(shape), sigmas.reshape(shape)
+
+
+def batch_observables_fpeqs(
+    var_func,
+    var_hat_func,
+    funs=[lambda m, q, sigma: 1 + q - 2 * m],
+    alphas=np.logspace(-2, 2, 16),
+    reg_params=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+):
+    ms, qs, sigmas = batch_state_equations(
+        var_func, var_hat_func, reg_params, alphas, initial_cond, var_hat_kwargs
+    )
+    fixed_point_sols = {"m": ms, "q": qs, "sigma": sigmas}
+    return [f(**fixed_point_sols) for f in funs]
+
+
+def batch_different_alpha_observables_fpeqs(
+    var_func,
+    var_hat_func,
+    funs=[lambda m, q, sigma: 1 + q - 2 * m],
+    alpha_1=0.01,
+    alpha_2=100,
+    n_alpha_points=16,
+    reg_param=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+):
+    alphas = np.logspace(
+        np.log(alpha_1) / np.log(10), np.log(alpha_2) / np.log(10), n_alpha_points
+    )
+    out_list = batch_observables_fpeqs(
+        var_func,
+        var_hat_func,
+        funs=funs,
+        alphas=alphas,
+        reg_params=reg_param,
+        initial_cond=initial_cond,
+        var_hat_kwargs=var_hat_kwargs,
+    )
+    return alphas, out_list
+
+
+def batch_different_reg_param_gen_error(
+    var_func,
+    var_hat_func,
+    funs=[lambda m, q, sigma: 1 + q - 2 * m],
+    reg_param_1=0.01,
+    reg_param_2=100,
+    n_reg_param_points=16,
+    alpha=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+):
+    reg_params = np.logspace(
+        np.log(reg_param_1) / np.log(10),
+        np.log(reg_param_2) / np.log(10),
+        n_reg_param_points,
+    )
+    out_list = batch_observables_fpeqs(
+        var_func,
+        var_hat_func,
+        funs=funs,
+        alphas=alpha,
+        reg_params=reg_params,
+        initial_cond=initial_cond,
+        var_hat_kwargs=var_hat_kwargs,
+    )
     return reg_params, out_list
+
+
+# ------------------
+# Adaptive alpha grid
+# ------------------
+
+
+def _interpolation_errors(log_params, values):
+    # estimate of the error of the linear interpolation in log(param) inside each
+    # interval, from the second divided differences of the neighbouring triples,
+    # relative to the size of the values
+    h = np.diff(log_params)
+    slopes = np.diff(values, axis=0) / h[:, None]
+    second_differences = np.abs(np.diff(slopes, axis=0)) / (h[:-1] + h[1:])[:, None]
+
+    curvatures = np.zeros_like(slopes)
+    curvatures[:-1] = second_differences
+    curvatures[1:] = np.maximum(curvatures[1:], second_differences)
+
+    scales = np.maximum(np.abs(values[:-1]) + np.abs(values[1:]), 1e-12)
+    return np.max(0.25 * h[:, None] ** 2 * curvatures / scales, axis=1)
+
+
+def adaptive_log_grid(
+    evaluate,
+    param_1,
+    param_2,
+    n_points=ADAPTIVE_INITIAL_POINTS,
+    tol=ADAPTIVE_TOL,
+    max_points=ADAPTIVE_MAX_POINTS,
+    min_log_step=ADAPTIVE_MIN_LOG_STEP,
+):
+    # evaluate(params, seeds) returns the values at params, one row each, and a
+    # seed per point that is handed back when the neighbouring midpoints are
+    # evaluated (None for the first grid). Intervals whose interpolation error
+    # is above tol are bisected, in rounds that only take the intervals within
+    # ADAPTIVE_ROUND_FRACTION of the worst one, until none is left or the grid
+    # holds max_points. Jumps are bisected down to min_log_step.
+    log_params = np.linspace(np.log(param_1), np.log(param_2), n_points)
+    values, seeds = evaluate(np.exp(log_params), [None] * n_points)
+    values = np.asarray(values, dtype=float).reshape(n_points, -1)
+    seeds = list(seeds)
+
+    while len(log_params) < max_points:
+        errors = _interpolation_errors(log_params, values)
+        errors[np.diff(log_params) < 2 * min_log_step] = 0.0
+        threshold = max(tol, ADAPTIVE_ROUND_FRACTION * np.max(errors))
+        to_refine = np.argsort(errors)[::-1][: max_points - len(log_params)]
+        to_refine = np.sort(to_refine[errors[to_refine] > threshold])
+        if len(to_refine) == 0:
+            break
+
+        new_log_params = 0.5 * (log_params[to_refine] + log_params[to_refine + 1])
+        new_values, new_seeds = evaluate(
+            np.exp(new_log_params), [seeds[idx] for idx in to_refine]
+        )
+        new_values = np.asarray(new_values, dtype=float).reshape(len(to_refine), -1)
+
+        log_params = np.insert(log_params, to_refine + 1, new_log_params)
+        values = np.insert(values, to_refine + 1, new_values, axis=0)
+        for idx, seed in sorted(zip(to_refine, new_seeds), reverse=True):
+            seeds.insert(idx + 1, seed)
+
+    return np.exp(log_params), values
+
+
+def adaptive_different_alpha_observables_fpeqs(
+    var_func,
+    var_hat_func,
+    funs=[lambda m, q, sigma: 1 + q - 2 * m],
+    alpha_1=0.01,
+    alpha_2=100,
+    n_alpha_points=ADAPTIVE_INITIAL_POINTS,
+    reg_param=0.1,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+    solver_kwargs={},
+    tol=ADAPTIVE_TOL,
+    max_alpha_points=ADAPTIVE_MAX_POINTS,
+):
+    # the midpoints start from the fixed point of their left neighbour
+    def evaluate(alphas, seeds):
+        inputs = [
+            (
+                a,
+                var_func,
+                var_hat_func,
+                reg_param,
+                initial_cond if seed is None else seed,
+                var_hat_kwargs,
+                solver_kwargs,
+            )
+            for a, seed in zip(alphas, seeds)
+        ]
+
+        with Pool() as pool:
+            results = pool.starmap(_find_fixed_point, inputs)
+
+        values = [
+            [f(m=m, q=q, sigma=sigma) for f in funs] for m, q, sigma, _ in results
+        ]
+        return values, [[m, q, sigma] for m, q, sigma, _ in results]
+
+    alphas, values = adaptive_log_grid(
+        evaluate,
+        alpha_1,
+        alpha_2,
+        n_points=n_alpha_points,
+        tol=tol,
+        max_points=max_alpha_points,
+    )
+
+    out_list = [values[:, idx] for idx in range(len(funs))]
+    return alphas, out_list
+
+
+# ------------------
+# Multi-start search
+# ------------------
+
+
+def random_initial_conditions(n_starts, var_hat_kwargs, rng=None):
+    # same draw as the runners in src/utils.py: (m, q, sigma) uniform in
+    # [0.1, 0.99] with m^2 < q + delta * q for all the noise variances
+    rng = np.random.default_rng(rng)
+    deltas = [
+        var_hat_kwargs[key]
+        for key in ["delta", "delta_small", "delta_large"]
+        if key in var_hat_kwargs
+    ]
+
+    initial_conds = np.empty((n_starts, 3))
+    idx = 0
+    while idx < n_starts:
+        m, q, sigma = 0.89 * rng.random(3) + 0.1
+        if all(np.square(m) < q + delta * q for delta in deltas):
+            initial_conds[idx] = m, q, sigma
+            idx += 1
+    return initial_conds
+
+
+def cluster_fixed_points(fixed_points, cluster_tol=MULTI_START_CLUSTER_TOL):
+    # greedy clustering of the converged solutions, two solutions are the same
+    # fixed point when they agree within cluster_tol relative to their size
+    centers, counts = [], []
+    for x in fixed_points:
+        for idx, center in enumerate(centers):
+            if np.all(
+                np.abs(x - center) <= cluster_tol * np.maximum(1, np.abs(center))
+            ):
+                counts[idx] += 1
+                break
+        else:
+            centers.append(np.array(x, dtype=float))
+            counts.append(1)
+
+    order = np.argsort(counts)[::-1]
+    return np.array(centers).reshape(-1, 3)[order], np.array(counts, dtype=int)[order]
+
+
+def _multi_start_fixed_points(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alphas,
+    initial_conds,
+    var_hat_kwargs,
+    solver_kwargs,
+    parallel=False,
+):
+    # converged fixed points with shape (n_alphas, n_starts, 3), nan elsewhere;
+    # jitted channels go through the batched kernel (on numba threads with
+    # parallel=True), the others through a Pool
+    if hasattr(var_hat_func, "py_func") and len(solver_kwargs) == 0:
+        ms, qs, sigmas, converged = batch_state_equations(
+            var_func,
+            var_hat_func,
+            reg_param,
+            np.asarray(alphas)[:, None],
+            initial_conds.T[:, None, :],
+            var_hat_kwargs,
+            full_output=True,
+            parallel=parallel,
+        )
+        fixed_points = np.stack([ms, qs, sigmas], axis=-1)
+    else:
+        inputs = [
+            (a, var_func, var_hat_func, reg_param, init, var_hat_kwargs, solver_kwargs)
+            for a in alphas
+            for init in initial_conds
+        ]
+
+        with Pool() as pool:
+            results = pool.starmap(_find_fixed_point, inputs)
+
+        fixed_points = np.array([res[:3] for res in results], dtype=float).reshape(
+            len(alphas), len(initial_conds), 3
+        )
+        converged = np.array(
+            [res[3]["status"] == "converged" for res in results]
+        ).reshape(len(alphas), len(initial_conds))
+
+    fixed_points[~converged] = np.nan
+    return fixed_points
+
+
+def multi_start_state_equations(
+    var_func,
+    var_hat_func,
+    reg_param,
+    alpha,
+    var_hat_kwargs,
+    n_starts=MULTI_START_POINTS,
+    initial_conds=None,
+    cluster_tol=MULTI_START_CLUSTER_TOL,
+    solver_kwargs={},
+    rng=None,
+    parallel=False,
+):
+    # distinct fixed points reached from n_starts random starts, with the number
+    # of starts that ended in each (the starts that did not converge are dropped)
+    if initial_conds is None:
+        initial_conds = random_initial_conditions(n_starts, var_hat_kwargs, rng)
+
+    fixed_points = _multi_start_fixed_points(
+        var_func,
+        var_hat_func,
+        reg_param,
+        [alpha],
+        np.asarray(initial_conds, dtype=float),
+        var_hat_kwargs,
+        solver_kwargs,
+        parallel,
+    )[0]
+    return cluster_fixed_points(
+        fixed_points[np.all(np.isfinite(fixed_points), axis=1)], cluster_tol
+    )
+
+
+def multi_start_different_alpha_fpeqs(
+    var_func,
+    var_hat_func,
+    alpha_1=0.01,
+    alpha_2=100,
+    n_alpha_points=16,
+    reg_param=0.1,
+    var_hat_kwargs={},
+    n_starts=MULTI_START_POINTS,
+    cluster_tol=MULTI_START_CLUSTER_TOL,
+    solver_kwargs={},
+    rng=None,
+    parallel=False,
+):
+    alphas = np.logspace(
+        np.log(alpha_1) / np.log(10), np.log(alpha_2) / np.log(10), n_alpha_points
+    )
+    initial_conds = random_initial_conditions(n_starts, var_hat_kwargs, rng)
+
+    fixed_points = _multi_start_fixed_points(
+        var_func,
+        var_hat_func,
+        reg_param,
+        alphas,
+        initial_conds,
+        var_hat_kwargs,
+        solver_kwargs,
+        parallel,
+    )
+
+    results = []
+    for points in fixed_points:
+        results.append(
+            cluster_fixed_points(
+                points[np.all(np.isfinite(points), axis=1)], cluster_tol
+            )
+        )
+    return alphas, results
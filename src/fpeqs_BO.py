@@ -1,8 +1,23 @@
 import src.numerical_functions as numfun
 from numba import njit
+import numpy as np
 
+GAUSS_LEGENDRE_POINTS = 32
+GAUSS_HERMITE_POINTS = 64
+# panel edges around the centre of each gaussian component, in units of its std
+PANEL_EDGES = np.array([0.0, 1.0, 2.0, 4.0, 8.0, 12.0])
 
-@njit(error_model="numpy", fastmath=True)
+_LEGENDRE_NODES, _LEGENDRE_WEIGHTS = np.polynomial.legendre.leggauss(
+    GAUSS_LEGENDRE_POINTS
+)
+_HERMITE_NODES, _HERMITE_WEIGHTS = np.polynomial.hermite_e.hermegauss(
+    GAUSS_HERMITE_POINTS
+)
+# weights of the standard gaussian measure
+_HERMITE_WEIGHTS = _HERMITE_WEIGHTS / np.sqrt(2 * np.pi)
+
+
+@njit(error_model="numpy")
 def var_func_BO(
     m_hat, q_hat, sigma_hat, reg_param,
 ):
@@ -10,42 +25,159 @@ def var_func_BO(
     return q, q, 1 - q
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_BO_single_noise(m, q, sigma, alpha, delta):
     q_hat = alpha / (1 + delta - q)
     return q_hat, q_hat, q_hat
 
 
-def var_hat_func_BO_num_single_noise(m, q, sigma, alpha, delta):
-    q_hat = alpha * numfun.q_hat_equation_BO_single_noise(m, q, sigma, delta)
+@njit(error_model="numpy")
+def fixed_point_BO_single_noise(alpha, reg_param, delta):
+    # smaller root of q^2 - (1 + delta + alpha) q + alpha = 0
+    b = 1 + delta + alpha
+    q = 2 * alpha / (b + np.sqrt(b ** 2 - 4 * alpha))
+    return q, q, 1 - q
+
+
+def var_hat_func_BO_num_single_noise(
+    m, q, sigma, alpha, delta, integration_backend="dblquad"
+):
+    q_hat = alpha * numfun.q_hat_equation_BO_single_noise(
+        m, q, sigma, delta, integration_backend=integration_backend
+    )
     return q_hat, q_hat, q_hat
 
 
+@njit(error_model="numpy")
+def _gaussian(x, variance):
+    return np.exp(-(x ** 2) / (2 * variance)) / np.sqrt(2 * np.pi * variance)
+
+
+@njit(error_model="numpy")
+def _panels_integral(func_args, centre_1, scale_1, centre_2, scale_2):
+    # composite Gauss-Legendre over y, the panels are refined around the centre
+    # of the two gaussian components and cover 12 std on both sides of them
+    n_edges = len(PANEL_EDGES)
+    edges = np.empty(4 * n_edges)
+    edges[:n_edges] = centre_1 - scale_1 * PANEL_EDGES
+    edges[n_edges : 2 * n_edges] = centre_1 + scale_1 * PANEL_EDGES
+    edges[2 * n_edges : 3 * n_edges] = centre_2 - scale_2 * PANEL_EDGES
+    edges[3 * n_edges :] = centre_2 + scale_2 * PANEL_EDGES
+    edges = np.sort(edges)
+
+    integral = 0.0
+    for idx in range(len(edges) - 1):
+        half_width = (edges[idx + 1] - edges[idx]) / 2
+        if half_width == 0.0:
+            continue
+        mid_point = (edges[idx + 1] + edges[idx]) / 2
+        for node, weight in zip(_LEGENDRE_NODES, _LEGENDRE_WEIGHTS):
+            integral += (
+                half_width
+                * weight
+                * _q_integrand_y(mid_point + half_width * node, *func_args)
+            )
+    return integral
+
+
+@njit(error_model="numpy")
+def _q_integrand_y(y, omega, V, delta_small, delta_large, eps, beta):
+    # Zout fout^2 = (d_omega Zout)^2 / Zout for the mixture channel
+    variance_small = V + delta_small
+    variance_large = beta ** 2 * V + delta_large
+    small = (1 - eps) * _gaussian(y - omega, variance_small)
+    large = eps * _gaussian(y - beta * omega, variance_large)
+    z_out = small + large
+    if z_out == 0.0:
+        return 0.0
+    dz_out = (y - omega) / variance_small * small + beta * (
+        y - beta * omega
+    ) / variance_large * large
+    return dz_out ** 2 / z_out
+
+
+@njit(error_model="numpy")
 def var_hat_func_BO_double_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage
 ):
-    raise NotImplementedError
+    # Zout and fout depend on y - sqrt(q) xi only, the xi integral is one
+    V = 1 - q
+    q_hat = alpha * _panels_integral(
+        (0.0, V, delta_small, delta_large, percentage, 1.0),
+        0.0,
+        np.sqrt(V + delta_small),
+        0.0,
+        np.sqrt(V + delta_large),
+    )
+    return q_hat, q_hat, q_hat
 
 
 def var_hat_func_BO_num_double_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    integration_backend="dblquad",
 ):
     q_hat = alpha * numfun.q_hat_equation_BO_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        integration_backend=integration_backend,
     )
     return q_hat, q_hat, q_hat
 
 
+@njit(error_model="numpy")
 def var_hat_func_BO_decorrelated_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage, beta
 ):
-    raise NotImplementedError
+    # the large component is centred in beta sqrt(q) xi, the xi integral is
+    # done with Gauss-Hermite and the y integral with the panels for each node
+    V = 1 - q
+    scale_small = np.sqrt(V + delta_small)
+    scale_large = np.sqrt(beta ** 2 * V + delta_large)
+
+    integral = 0.0
+    for xi, weight in zip(_HERMITE_NODES, _HERMITE_WEIGHTS):
+        omega = np.sqrt(q) * xi
+        integral += weight * _panels_integral(
+            (omega, V, delta_small, delta_large, percentage, beta),
+            omega,
+            scale_small,
+            beta * omega,
+            scale_large,
+        )
+
+    q_hat = alpha * integral
+    return q_hat, q_hat, q_hat
 
 
 def var_hat_func_BO_num_decorrelated_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage, beta
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    beta,
+    integration_backend="dblquad",
 ):
     q_hat = alpha * numfun.q_hat_equation_BO_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        beta,
+        integration_backend=integration_backend,
     )
     return q_hat, q_hat, q_hat
@@ -2,17 +2,10 @@ import src.numerical_functions as numfun
 from numba import njit
 import numpy as np
 from math import erf, erfc
+from src.fpeqs_L2 import var_func_L2
 
-@njit(error_model="numpy", fastmath=True)
-def var_func_L2(
-    m_hat, q_hat, sigma_hat, reg_param,
-):
-    m = m_hat / (sigma_hat + reg_param)
-    q = (m_hat ** 2 + q_hat) / (sigma_hat + reg_param) ** 2
-    sigma = 1.0 / (sigma_hat + reg_param)
-    return m, q, sigma
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_Huber_single_noise(m, q, sigma, alpha, delta, a):
     arg_sqrt = 1 + q + delta - 2 * m
     erf_arg = (a * (sigma + 1)) / np.sqrt(2 * arg_sqrt)
@@ -31,16 +24,25 @@ def var_hat_func_Huber_single_noise(m, q, sigma, alpha, delta, a):
     return m_hat, q_hat, sigma_hat
 
 
-def var_hat_func_Huber_num_single_noise(m, q, sigma, alpha, delta, a):
-    m_hat = alpha * numfun.m_hat_equation_Huber_single_noise(m, q, sigma, delta, a)
-    q_hat = alpha * numfun.q_hat_equation_Huber_single_noise(m, q, sigma, delta, a)
-    sigma_hat = -alpha * numfun.sigma_hat_equation_Huber_single_noise(
-        m, q, sigma, delta, a
+def var_hat_func_Huber_num_single_noise(
+    m, q, sigma, alpha, delta, a, integration_backend="dblquad", semi_analytic=False
+):
+    m_int, q_int, sigma_int = numfun.hat_equations_Huber_single_noise(
+        m,
+        q,
+        sigma,
+        delta,
+        a,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_Huber_double_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage, a
 ):
@@ -72,21 +74,35 @@ def var_hat_func_Huber_double_noise(
 
 
 def var_hat_func_Huber_num_double_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage, a
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    a,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_Huber_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage, a,
-    )
-    q_hat = alpha * numfun.q_hat_equation_Huber_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage, a,
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_Huber_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage, a,
+    m_int, q_int, sigma_int = numfun.hat_equations_Huber_double_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        a,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_Huber_decorrelated_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage, beta, a
 ):
@@ -118,15 +134,31 @@ def var_hat_func_Huber_decorrelated_noise(
 
 
 def var_hat_func_Huber_num_decorrelated_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage, beta, a
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    beta,
+    a,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_Huber_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta, a,
-    )
-    q_hat = alpha * numfun.q_hat_equation_Huber_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta, a,
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_Huber_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta, a,
+    m_int, q_int, sigma_int = numfun.hat_equations_Huber_decorrelated_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        beta,
+        a,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
@@ -2,18 +2,10 @@ import src.numerical_functions as numfun
 from numba import njit
 import numpy as np
 from math import erf, erfc
-
-@njit(error_model="numpy", fastmath=True)
-def var_func_L2(
-    m_hat, q_hat, sigma_hat, reg_param,
-):
-    m = m_hat / (sigma_hat + reg_param)
-    q = (m_hat ** 2 + q_hat) / (sigma_hat + reg_param) ** 2
-    sigma = 1.0 / (sigma_hat + reg_param)
-    return m, q, sigma
+from src.fpeqs_L2 import var_func_L2
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_L1_single_noise(m, q, sigma, alpha, delta):
     sqrt_arg = 1 + q + delta - 2 * m
     erf_arg = sigma / np.sqrt(2 * sqrt_arg)
@@ -28,14 +20,24 @@ def var_hat_func_L1_single_noise(m, q, sigma, alpha, delta):
     return m_hat, q_hat, sigma_hat
 
 
-def var_hat_func_L1_num_single_noise(m, q, sigma, alpha, delta):
-    m_hat = alpha * numfun.m_hat_equation_L1_single_noise(m, q, sigma, delta)
-    q_hat = alpha * numfun.q_hat_equation_L1_single_noise(m, q, sigma, delta)
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L1_single_noise(m, q, sigma, delta)
+def var_hat_func_L1_num_single_noise(
+    m, q, sigma, alpha, delta, integration_backend="dblquad", semi_analytic=False
+):
+    m_int, q_int, sigma_int = numfun.hat_equations_L1_single_noise(
+        m,
+        q,
+        sigma,
+        delta,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
+    )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_L1_double_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage
 ):
@@ -74,21 +76,33 @@ def var_hat_func_L1_double_noise(
 
 
 def var_hat_func_L1_num_double_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_L1_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
-    )
-    q_hat = alpha * numfun.q_hat_equation_L1_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L1_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
+    m_int, q_int, sigma_int = numfun.hat_equations_L1_double_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_L1_decorrelated_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage, beta
 ):
@@ -126,15 +140,29 @@ def var_hat_func_L1_decorrelated_noise(
 
 
 def var_hat_func_L1_num_decorrelated_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage, beta
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    beta,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_L1_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
-    )
-    q_hat = alpha * numfun.q_hat_equation_L1_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L1_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
+    m_int, q_int, sigma_int = numfun.hat_equations_L1_decorrelated_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        beta,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
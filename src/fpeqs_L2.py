@@ -3,7 +3,7 @@ from numba import njit
 import numpy as np
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_func_L2(
     m_hat, q_hat, sigma_hat, reg_param,
 ):
@@ -13,7 +13,55 @@ def var_func_L2(
     return m, q, sigma
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
+def _sigma_L2(alpha, reg_param):
+    # positive root of reg_param sigma^2 + (alpha + reg_param - 1) sigma - 1 = 0
+    b = alpha + reg_param - 1
+    if b < 0:
+        # no cancellation in this form when b < 0, i.e. alpha < 1 and small reg_param
+        return (np.sqrt(b ** 2 + 4 * reg_param) - b) / (2 * reg_param)
+    return 2.0 / (b + np.sqrt(b ** 2 + 4 * reg_param))
+
+
+@njit(error_model="numpy")
+def _fixed_point_L2(alpha, reg_param, delta_eff, k, c):
+    # m_hat = alpha k / (1 + sigma), sigma_hat = alpha / (1 + sigma) and q_hat
+    # linear in q, so var_func_L2 gives sigma from _sigma_L2 and m, q directly
+    sigma = _sigma_L2(alpha, reg_param)
+    m = alpha * k * sigma / (1 + sigma)
+    a = alpha * sigma ** 2 / (1 + sigma) ** 2
+    q = (m ** 2 + a * (1 + delta_eff + c - 2 * np.abs(m) * k)) / (1 - a)
+    return m, q, sigma
+
+
+@njit(error_model="numpy")
+def fixed_point_L2_single_noise(alpha, reg_param, delta):
+    return _fixed_point_L2(alpha, reg_param, delta, 1.0, 0.0)
+
+
+@njit(error_model="numpy")
+def fixed_point_L2_double_noise(
+    alpha, reg_param, delta_small, delta_large, percentage
+):
+    delta_eff = (1 - percentage) * delta_small + percentage * delta_large
+    return _fixed_point_L2(alpha, reg_param, delta_eff, 1.0, 0.0)
+
+
+@njit(error_model="numpy")
+def fixed_point_L2_decorrelated_noise(
+    alpha, reg_param, delta_small, delta_large, percentage, beta
+):
+    delta_eff = (1 - percentage) * delta_small + percentage * delta_large
+    return _fixed_point_L2(
+        alpha,
+        reg_param,
+        delta_eff,
+        1 + percentage * (beta - 1),
+        percentage * (beta ** 2 - 1),
+    )
+
+
+@njit(error_model="numpy")
 def var_hat_func_L2_single_noise(m, q, sigma, alpha, delta):
     m_hat = alpha / (1 + sigma)
     q_hat = alpha * (1 + q + delta - 2 * np.abs(m)) / ((1 + sigma) ** 2)
@@ -21,14 +69,24 @@ def var_hat_func_L2_single_noise(m, q, sigma, alpha, delta):
     return m_hat, q_hat, sigma_hat
 
 
-def var_hat_func_L2_num_single_noise(m, q, sigma, alpha, delta):
-    m_hat = alpha * numfun.m_hat_equation_L2_single_noise(m, q, sigma, delta)
-    q_hat = alpha * numfun.q_hat_equation_L2_single_noise(m, q, sigma, delta)
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L2_single_noise(m, q, sigma, delta)
+def var_hat_func_L2_num_single_noise(
+    m, q, sigma, alpha, delta, integration_backend="dblquad", semi_analytic=False
+):
+    m_int, q_int, sigma_int = numfun.hat_equations_L2_single_noise(
+        m,
+        q,
+        sigma,
+        delta,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
+    )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_L2_double_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage
 ):
@@ -40,21 +98,33 @@ def var_hat_func_L2_double_noise(
 
 
 def var_hat_func_L2_num_double_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_L2_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
-    )
-    q_hat = alpha * numfun.q_hat_equation_L2_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L2_double_noise(
-        m, q, sigma, delta_small, delta_large, percentage
+    m_int, q_int, sigma_int = numfun.hat_equations_L2_double_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
 
 
-@njit(error_model="numpy", fastmath=True)
+@njit(error_model="numpy")
 def var_hat_func_L2_decorrelated_noise(
     m, q, sigma, alpha, delta_small, delta_large, percentage, beta
 ):
@@ -78,15 +148,29 @@ def var_hat_func_L2_decorrelated_noise(
 
 
 def var_hat_func_L2_num_decorrelated_noise(
-    m, q, sigma, alpha, delta_small, delta_large, percentage, beta
+    m,
+    q,
+    sigma,
+    alpha,
+    delta_small,
+    delta_large,
+    percentage,
+    beta,
+    integration_backend="dblquad",
+    semi_analytic=False,
 ):
-    m_hat = alpha * numfun.m_hat_equation_L2_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
-    )
-    q_hat = alpha * numfun.q_hat_equation_L2_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
-    )
-    sigma_hat = -alpha * numfun.sigma_hat_equation_L2_decorrelated_noise(
-        m, q, sigma, delta_small, delta_large, percentage, beta
+    m_int, q_int, sigma_int = numfun.hat_equations_L2_decorrelated_noise(
+        m,
+        q,
+        sigma,
+        delta_small,
+        delta_large,
+        percentage,
+        beta,
+        integration_backend=integration_backend,
+        semi_analytic=semi_analytic,
     )
+    m_hat = alpha * m_int
+    q_hat = alpha * q_int
+    sigma_hat = -alpha * sigma_int
     return m_hat, q_hat, sigma_hat
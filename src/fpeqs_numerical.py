@@ -5,10 +5,18 @@ from math import erf, erfc
 
 
 def var_hat_func_numerical_loss_single_noise(
-    m, q, sigma, alpha, delta, precompute_proximal_func, loss_args
+    m, q, sigma, alpha, delta, precompute_proximal_func, loss_args, grid_context=None
 ):
+    # grid_context from numfun.numerical_loss_grid_context(delta), built once
+    # per sweep, otherwise it is built at every call
     m_int, q_int, sigma_int = numfun.hat_equations_numerical_loss_single_noise(
-        m, q, sigma, delta, precompute_proximal_func, loss_args
+        m,
+        q,
+        sigma,
+        delta,
+        precompute_proximal_func,
+        loss_args,
+        grid_context=grid_context,
     )
     # print("m_int {} q_int {} sigma_int {}".format(m_int, q_int, sigma_int))
     m_hat = alpha * m_int
@@ -25,9 +33,9 @@ def var_hat_func_numerical_loss_double_noise(
     delta_small,
     delta_large,
     percentage,
-    loss_derivative,
-    loss_second_derivative,
-    loss_args=None,
+    precompute_proximal_func,
+    loss_args,
+    grid_context=None,
 ):
     m_int, q_int, sigma_int = numfun.hat_equations_numerical_loss_double_noise(
         m,
@@ -36,9 +44,9 @@ def var_hat_func_numerical_loss_double_noise(
         delta_small,
         delta_large,
         percentage,
-        loss_derivative,
-        loss_second_derivative,
-        loss_args=loss_args,
+        precompute_proximal_func,
+        loss_args,
+        grid_context=grid_context,
     )
     m_hat = alpha * m_int
     q_hat = alpha * q_int
@@ -55,9 +63,9 @@ def var_hat_func_numerical_loss_decorrelated_noise(
     delta_large,
     percentage,
     beta,
-    loss_derivative,
-    loss_second_derivative,
-    loss_args=None,
+    precompute_proximal_func,
+    loss_args,
+    grid_context=None,
 ):
     m_int, q_int, sigma_int = numfun.hat_equations_numerical_loss_decorrelated_noise(
         m,
@@ -67,9 +75,9 @@ def var_hat_func_numerical_loss_decorrelated_noise(
         delta_large,
         percentage,
         beta,
-        loss_derivative,
-        loss_second_derivative,
-        loss_args=loss_args,
+        precompute_proximal_func,
+        loss_args,
+        grid_context=grid_context,
     )
     m_hat = alpha * m_int
     q_hat = alpha * q_int
@@ -0,0 +1,57 @@
+import numpy as np
+from functools import lru_cache
+from inspect import signature
+from numba import guvectorize
+
+# Array versions of the closed-form channel functions of fpeqs_L2, fpeqs_L1,
+# fpeqs_Huber and fpeqs_BO (and of var_func_L2, var_func_BO), any njit function
+# of scalars returning three scalars works. They are compiled the first time
+# they are asked for and kept, the arguments broadcast against each other.
+
+
+def _n_arguments(func):
+    py_func = getattr(func, "py_func", func)
+    return len(signature(py_func).parameters)
+
+
+@lru_cache(maxsize=None)
+def vectorized_channel_func(func, parallel=False):
+    n_arguments = _n_arguments(func)
+    arg_names = ", ".join("x{}".format(idx) for idx in range(n_arguments))
+
+    # the kernel needs a fixed number of arguments, so it is generated
+    source = (
+        "def kernel({0}, out_0, out_1, out_2):\n"
+        "    out_0[0], out_1[0], out_2[0] = func({0})\n"
+    ).format(arg_names)
+    namespace = {"func": func}
+    exec(source, namespace)
+
+    return guvectorize(
+        [
+            "void({}, float64[:], float64[:], float64[:])".format(
+                ", ".join(["float64"] * n_arguments)
+            )
+        ],
+        ", ".join(["()"] * n_arguments) + "->(),(),()",
+        target="parallel" if parallel else "cpu",
+        nopython=True,
+        # same floating point flags as func, otherwise the inlined code can be
+        # optimised differently and lose bit compatibility
+        fastmath=func.targetoptions.get("fastmath", False),
+    )(namespace["kernel"])
+
+
+def vectorized_var_hat_func(
+    var_hat_func, m, q, sigma, alpha, var_hat_kwargs, parallel=False
+):
+    # keyword version, same call as var_hat_func(m, q, sigma, alpha, **var_hat_kwargs)
+    py_func = getattr(var_hat_func, "py_func", var_hat_func)
+    names = list(signature(py_func).parameters)[4:]
+    return vectorized_channel_func(var_hat_func, parallel)(
+        m,
+        q,
+        sigma,
+        alpha,
+        *[np.asarray(var_hat_kwargs[name], dtype=float) for name in names],
+    )
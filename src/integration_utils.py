@@ -1,11 +1,24 @@
 import numpy as np
-from scipy.integrate import romb
-from numba import njit
+from functools import lru_cache
+from scipy import LowLevelCallable
+from scipy.integrate import romb, nquad, quad
+from numba import njit, cfunc, types
 
 MULT_INTEGRAL = 12
 TOL_INT = 1e-8
 N_TEST_POINTS = 200
 K_ROMBERG = 13
+# bytes of the row blocks alive at the same time in tiled_romb_integration
+ROMBERG_MAX_MEMORY = 2 ** 26
+BORDERS_CACHE_DIGITS = 4
+BORDERS_CACHE_SIZE = 100000
+GAUSS_POINTS = 128
+GAUSS_PANEL_POINTS = 32
+
+# running count of integrand evaluations of this process, read by the solvers
+_integrand_evaluations = [0]
+# borders found by integration_borders, by integrand and quantised parameters
+_borders_cache = {}
 
 # if _check_nested_list(square_borders):
 #     max_range = square_borders[0][1]
@@ -72,6 +85,62 @@ def find_integration_borders_square(
     return borders
 
 
+def _quantise(values, digits=BORDERS_CACHE_DIGITS):
+    return tuple(float("{:.{}g}".format(value, digits)) for value in values)
+
+
+def _max_on_border(fun, border, idx, other_widths, n_points, args):
+    # the integrands take arrays, a whole edge of the box is one call
+    pts = np.linspace(-other_widths[0], other_widths[1], n_points)
+    if idx == 0:
+        values = fun(border, pts, *args)
+    else:
+        values = fun(pts, border, *args)
+    return np.max(np.asarray(values))
+
+
+def integration_borders(
+    fun,
+    scale1,
+    scale2,
+    args=(),
+    mult=MULT_INTEGRAL,
+    tol=TOL_INT,
+    n_points=N_TEST_POINTS,
+):
+    # Same borders as find_integration_borders_square for fun(y, xi, *args),
+    # scalar or vector valued. scale1 and scale2 are the standard deviations of
+    # y and xi, so the box of mult of them almost always holds the integrand:
+    # it is only checked on its edges and widened where it is still above tol.
+    # The borders are cached by integrand and quantised parameters, they barely
+    # move between two iterations of the state equations.
+    key = (fun, _quantise((scale1, scale2, mult, tol, n_points) + tuple(args)))
+    if key not in _borders_cache:
+        # distance of the lower and upper border from zero along y and xi
+        widths = [[mult * scale1, mult * scale1], [mult * scale2, mult * scale2]]
+        for idx, scale in enumerate([scale1, scale2]):
+            for jdx, sign in enumerate([-1.0, 1.0]):
+                while (
+                    _max_on_border(
+                        fun,
+                        sign * widths[idx][jdx],
+                        idx,
+                        widths[1 - idx],
+                        n_points,
+                        args,
+                    )
+                    > tol
+                ):
+                    widths[idx][jdx] += scale
+
+        if len(_borders_cache) >= BORDERS_CACHE_SIZE:
+            _borders_cache.clear()
+        _borders_cache[key] = max(max(widths[0]), max(widths[1]))
+
+    max_val = _borders_cache[key]
+    return [[-max_val, max_val], [-max_val, max_val]]
+
+
 def divide_integration_borders_grid(square_borders, proportion=0.5):  # , sides_square=3
     if proportion >= 1.0 or proportion <= 0.0:
         raise ValueError(
@@ -324,4 +393,292 @@ def precompute_values_double_romb_integration(fun, x_range, y_range, args=[]):
 
 
 def double_romb_integration(F, dx, dy):
+    _integrand_evaluations[0] += F.size
     return romb(romb(F, dy), dx)
+
+
+@lru_cache(maxsize=None)
+def romberg_weights(n_points, dx):
+    # romb is linear in the samples, these are its weights: the trapezoid rule
+    # of every level is extrapolated with the same table as romb
+    k = int(np.log2(n_points - 1))
+    table = []
+    for level in range(k + 1):
+        step = 2 ** (k - level)
+        weights = np.zeros(n_points)
+        weights[::step] = step * dx
+        weights[0] = weights[-1] = step * dx / 2
+        table.append(weights)
+
+    for j in range(1, k + 1):
+        table = [
+            table[i] + (table[i] - table[i - 1]) / (4 ** j - 1)
+            for i in range(1, len(table))
+        ]
+    weights = table[-1]
+    weights.flags.writeable = False
+    return weights
+
+
+def romberg_grid_context(
+    lower, upper, n_buffers=1, dtype=np.float64, max_memory=ROMBERG_MAX_MEMORY
+):
+    # What does not change between two integrals on the square Romberg grid
+    # [lower, upper]^2: the ranges, the Romberg weights and the row blocks. The
+    # n_buffers scratch arrays of a block are allocated at the first integral
+    # and reused, so a context can be pickled to the workers before any use.
+    x_range = romberg_linspace(lower, upper)
+    y_range = romberg_linspace(lower, upper)
+    itemsize = np.dtype(dtype).itemsize
+    block_rows = int(max(1, max_memory // (n_buffers * itemsize * len(x_range))))
+    return {
+        "x_range": x_range,
+        "y_range": y_range,
+        "weights_x": romberg_weights(len(x_range), x_range[1] - x_range[0]),
+        "weights_y": romberg_weights(len(y_range), y_range[1] - y_range[0]),
+        "block_rows": block_rows,
+        "n_buffers": n_buffers,
+        "dtype": dtype,
+        "peak_memory": n_buffers
+        * itemsize
+        * len(x_range)
+        * min(block_rows, len(y_range)),
+        "buffers": None,
+    }
+
+
+def tiled_romb_integration(block_func, grid_context):
+    # Romberg integral over the grid of grid_context without building it.
+    # block_func(start, stop, buffers) returns the sums of the rows start:stop
+    # of y_range with the weights of the context, buffers are the scratch
+    # arrays of the context cut to the rows of the block.
+    if grid_context["buffers"] is None:
+        grid_context["buffers"] = [
+            np.empty(
+                (grid_context["block_rows"], len(grid_context["x_range"])),
+                dtype=grid_context["dtype"],
+            )
+            for _ in range(grid_context["n_buffers"])
+        ]
+
+    n_rows = len(grid_context["y_range"])
+    integrals = 0.0
+    for start in range(0, n_rows, grid_context["block_rows"]):
+        stop = min(start + grid_context["block_rows"], n_rows)
+        integrals = integrals + np.asarray(
+            block_func(
+                start,
+                stop,
+                [buffer[: stop - start] for buffer in grid_context["buffers"]],
+            )
+        )
+    _integrand_evaluations[0] += len(grid_context["x_range"]) * n_rows
+    return integrals
+
+
+def integrand_evaluations():
+    return _integrand_evaluations[0]
+
+
+@lru_cache(maxsize=None)
+def low_level_integrand(func, n_arguments, component=None):
+    # quadpack calls a cfunc double f(int n, double *xx) without going through
+    # the interpreter, xx holds the integration variables followed by the args.
+    # For a vector valued func, component picks one of its outputs.
+    arg_names = ", ".join("xx[{}]".format(idx) for idx in range(n_arguments))
+    source = "def kernel(n, xx):\n    return func({}){}\n".format(
+        arg_names, "" if component is None else "[{}]".format(component)
+    )
+    namespace = {"func": func}
+    exec(source, namespace)
+
+    kernel = cfunc(types.float64(types.intc, types.CPointer(types.float64)))(
+        namespace["kernel"]
+    )
+    return LowLevelCallable(kernel.ctypes)
+
+
+def _quadpack_integrand(func, args, component=None):
+    # njit integrands of floats are compiled, the others go through python
+    if hasattr(func, "py_func") and all(isinstance(arg, (int, float)) for arg in args):
+        return low_level_integrand(func, 2 + len(args), component)
+    if component is None:
+        return func
+    return lambda y, x, *args: func(y, x, *args)[component]
+
+
+def dblquad(func, a, b, gfun, hfun, args=(), epsabs=1.49e-8, epsrel=1.49e-8):
+    # same as scipy.integrate.dblquad, it also counts the integrand evaluations
+    def temp_ranges(*args):
+        return [
+            gfun(args[0]) if callable(gfun) else gfun,
+            hfun(args[0]) if callable(hfun) else hfun,
+        ]
+
+    value, abserr, out = nquad(
+        _quadpack_integrand(func, args),
+        [temp_ranges, [a, b]],
+        args=args,
+        opts={"epsabs": epsabs, "epsrel": epsrel},
+        full_output=True,
+    )
+    _integrand_evaluations[0] += out["neval"]
+    return value, abserr
+
+
+@lru_cache(maxsize=None)
+def gauss_legendre_nodes(n_points):
+    nodes, weights = np.polynomial.legendre.leggauss(n_points)
+    nodes.flags.writeable = False
+    weights.flags.writeable = False
+    return nodes, weights
+
+
+@lru_cache(maxsize=None)
+def gauss_hermite_nodes(n_points):
+    # the integrands already contain the gaussian weight of xi, so the weights
+    # are the ones of the plain integral over the real line
+    nodes, weights = np.polynomial.hermite_e.hermegauss(n_points)
+    weights = weights * np.exp(nodes ** 2 / 2)
+    nodes.flags.writeable = False
+    weights.flags.writeable = False
+    return nodes, weights
+
+
+def _gauss_tensor_rule(func, a, b, gfun, hfun, args, n_points):
+    if np.isinf(a) and np.isinf(b):
+        x, weights_x = gauss_hermite_nodes(n_points)
+    else:
+        nodes, weights = gauss_legendre_nodes(n_points)
+        x = (b + a) / 2 + (b - a) / 2 * nodes
+        weights_x = (b - a) / 2 * weights
+
+    lower = np.broadcast_to(gfun(x) if callable(gfun) else gfun, x.shape)
+    upper = np.broadcast_to(hfun(x) if callable(hfun) else hfun, x.shape)
+
+    nodes, weights = gauss_legendre_nodes(n_points)
+    half_width = (upper - lower)[:, None] / 2
+    Y = (upper + lower)[:, None] / 2 + half_width * nodes
+    X = np.repeat(x[:, None], n_points, axis=1)
+
+    # a vector valued integrand returns a tuple of arrays, one per component
+    F = np.asarray(func(Y, X, *args))
+    _integrand_evaluations[0] += Y.size
+    return np.sum(weights_x[:, None] * half_width * weights * F, axis=(-2, -1))
+
+
+def gauss_dblquad(
+    func,
+    a,
+    b,
+    gfun,
+    hfun,
+    args=(),
+    epsabs=1.49e-8,
+    epsrel=1.49e-8,
+    n_points=GAUSS_POINTS,
+):
+    # same call as dblquad, with a fixed tensor product rule: Gauss-Hermite in
+    # the outer variable if [a, b] is the real line and Gauss-Legendre otherwise,
+    # Gauss-Legendre in the inner one. The integrand is evaluated once on the
+    # whole grid of nodes, epsabs and epsrel are not used. The error is
+    # estimated with the rule of half the order.
+    value = _gauss_tensor_rule(func, a, b, gfun, hfun, args, n_points)
+    value_half = _gauss_tensor_rule(func, a, b, gfun, hfun, args, n_points // 2)
+    return value, np.abs(value - value_half)
+
+
+def dblquad_vector(
+    func, a, b, gfun, hfun, args=(), epsabs=1.49e-8, epsrel=1.49e-8, n_components=3
+):
+    # dblquad of each component of a vector valued integrand
+    values, errors = np.zeros(n_components), np.zeros(n_components)
+    for idx in range(n_components):
+        values[idx], errors[idx] = dblquad(
+            _quadpack_integrand(func, args, idx),
+            a,
+            b,
+            gfun,
+            hfun,
+            args=args,
+            epsabs=epsabs,
+            epsrel=epsrel,
+        )
+    return values, errors
+
+
+# gauss_dblquad integrates vector valued integrands as they are
+INTEGRATION_BACKENDS = {"dblquad": dblquad, "gauss": gauss_dblquad}
+VECTOR_INTEGRATION_BACKENDS = {"dblquad": dblquad_vector, "gauss": gauss_dblquad}
+
+
+def dblquad_backend(integration_backend, vector=False):
+    if integration_backend not in INTEGRATION_BACKENDS:
+        raise ValueError(
+            "integration_backend should be one of {}.".format(
+                list(INTEGRATION_BACKENDS)
+            )
+        )
+    if vector:
+        return VECTOR_INTEGRATION_BACKENDS[integration_backend]
+    return INTEGRATION_BACKENDS[integration_backend]
+
+
+# 1-D integrals of vector valued integrands, split in panels at the breakpoints
+
+
+def quad_panels(
+    func, breakpoints, args=(), epsabs=1.49e-8, epsrel=1.49e-8, n_components=3
+):
+    values, errors = np.zeros(n_components), np.zeros(n_components)
+    for lower, upper in zip(breakpoints[:-1], breakpoints[1:]):
+        if lower == upper:
+            continue
+        for idx in range(n_components):
+            value, abserr, out = quad(
+                lambda x, *args: func(x, *args)[idx],
+                lower,
+                upper,
+                args=args,
+                epsabs=epsabs,
+                epsrel=epsrel,
+                full_output=1,
+            )
+            _integrand_evaluations[0] += out["neval"]
+            values[idx] += value
+            errors[idx] += abserr
+    return values, errors
+
+
+def gauss_quad_panels(
+    func,
+    breakpoints,
+    args=(),
+    epsabs=1.49e-8,
+    epsrel=1.49e-8,
+    n_points=GAUSS_PANEL_POINTS,
+):
+    # Gauss-Legendre on each panel, with all the nodes in one call. epsabs and
+    # epsrel are not used, the error is estimated with the rule of half the order
+    breakpoints = np.asarray(breakpoints)
+    lower, upper = breakpoints[:-1, None], breakpoints[1:, None]
+
+    values = []
+    for n in [n_points, n_points // 2]:
+        nodes, weights = gauss_legendre_nodes(n)
+        x = (upper + lower) / 2 + (upper - lower) / 2 * nodes
+        F = np.asarray(func(x, *args))
+        _integrand_evaluations[0] += x.size
+        values.append(np.sum((upper - lower) / 2 * weights * F, axis=(-2, -1)))
+    return values[0], np.abs(values[0] - values[1])
+
+
+QUAD_BACKENDS = {"dblquad": quad_panels, "gauss": gauss_quad_panels}
+
+
+def quad_backend(integration_backend):
+    if integration_backend not in QUAD_BACKENDS:
+        raise ValueError(
+            "integration_backend should be one of {}.".format(list(QUAD_BACKENDS))
+        )
+    return QUAD_BACKENDS[integration_backend]
@@ -1,15 +1,21 @@
 import numpy as np
+from functools import lru_cache
+from inspect import signature
 from numba import njit
-from scipy.optimize import root_scalar
-from src.root_finding import brent_root_finder, find_first_greather_than_zero
 
 PROXIMAL_TOL = 1e-15
 RTOL = 1e-10
 
-BRAKETS_SCALAR_ROOT = 1e20
-DIVISION_POINTS = 200
-MULTIPLIER_NEAR_BUMP = 15
-MULTIPLIER_NEAR_PARABOLA = 2
+MAX_NEWTON_STEPS = 100
+MAX_BISECTION_STEPS = 60
+PROXIMAL_SCAN_POINTS = 64
+
+# proximal tables, the nodes are doubled until the cubic Hermite interpolation
+# is within PROXIMAL_TABLE_TOL (1 + |prox|) of the proximal and of its derivative
+PROXIMAL_TABLE_TOL = 1e-9
+PROXIMAL_TABLE_POINTS = 1025
+PROXIMAL_TABLE_MAX_POINTS = 2 ** 17 + 1
+PROXIMAL_TABLE_CACHE_SIZE = 16
 
 
 # ---
@@ -48,6 +54,11 @@ def DDloss_double_quad(y, z, width):
     return 1 + 2 * width * (width - 3 * (y - z) ** 2) / (((y - z) ** 2 + width) ** 3)
 
 
+@njit(error_model="numpy", fastmath=True)
+def DDDloss_double_quad(y, z, width):
+    return 24 * width * (y - z) * ((y - z) ** 2 - width) / (((y - z) ** 2 + width) ** 4)
+
+
 @njit(error_model="numpy", fastmath=True)
 def _proximal_argument_loss_double_quad(z, y, omega, V, width):
     return (
@@ -89,81 +100,291 @@ def _proximal_argument_second_derivative_loss_double_quad(z, y, omega, V, width)
 
 
 @njit(error_model="numpy", fastmath=True)
-def proximal_loss_double_quad(y, omega, V, width):
-    # width = loss_args["width"]
-    sgn = np.sign((V * y + omega) / (1 + V) - y)
+def _proximal_constants_loss_double_quad(V, width):
+    # The proximal objective F(z) = (z - omega)^2 / 2V + loss(y - z) has
+    # F'' = 1 / V + DDloss(y, z) < 0 only for inner < |y - z| < outer, as DDloss
+    # decreases in |y - z| up to sqrt(width) and then increases to 1. Outside
+    # F' is increasing, so each of the three pieces holds at most one minimum.
+    # The slope of loss(r) - r^2 / 2 is bounded by slope_bound, which bounds
+    # all the stationary points around the one of the quadratic part.
+    slope_bound = 9 / (8 * np.sqrt(3 * width))
+    if DDloss_double_quad(0.0, np.sqrt(width), width) >= -1 / V:
+        return 0.0, 0.0, slope_bound
+
+    low, high = 0.0, np.sqrt(width)
+    for _ in range(MAX_BISECTION_STEPS):
+        middle = 0.5 * (low + high)
+        if DDloss_double_quad(0.0, middle, width) >= -1 / V:
+            low = middle
+        else:
+            high = middle
+    inner = low
+
+    low, high = np.sqrt(width), 2 * np.sqrt(width)
+    while DDloss_double_quad(0.0, high, width) < -1 / V:
+        low, high = high, 2 * high
+    for _ in range(MAX_BISECTION_STEPS):
+        middle = 0.5 * (low + high)
+        if DDloss_double_quad(0.0, middle, width) < -1 / V:
+            low = middle
+        else:
+            high = middle
+    return inner, high, slope_bound
 
-    points_near_bump = np.linspace(
-        y - MULTIPLIER_NEAR_BUMP * width / V,
-        y + MULTIPLIER_NEAR_BUMP * width / V,
-        DIVISION_POINTS,
-    )
-    fun_evals_near_bump = _proximal_argument_derivative_loss_double_quad(
-        points_near_bump, y, omega, V, width
-    )
 
-    points_near_parabola = np.linspace(
-        (V * y + omega) / (1 + V) - MULTIPLIER_NEAR_PARABOLA * V / (V + 1),
-        (V * y + omega) / (1 + V) + MULTIPLIER_NEAR_PARABOLA * V / (V + 1),
-        DIVISION_POINTS,
-    )
-    fun_evals_near_parabola = _proximal_argument_derivative_loss_double_quad(
-        points_near_parabola, y, omega, V, width
-    )
+@njit(error_model="numpy", fastmath=True)
+def _safeguarded_newton_loss_double_quad(y, omega, V, width, low, high):
+    # root of F' in [low, high], where F' is increasing, Newton steps falling
+    # outside of the bracket are replaced by bisection steps
+    z = min(max((V * y + omega) / (1 + V), low), high)
+    for _ in range(MAX_NEWTON_STEPS):
+        derivative = (z - omega) / V - Dloss_double_quad(y, z, width)
+        if derivative > 0:
+            high = z
+        else:
+            low = z
+        z_new = z - derivative / (1 / V + DDloss_double_quad(y, z, width))
+        if not low <= z_new <= high:
+            z_new = 0.5 * (low + high)
+        if np.abs(z_new - z) <= PROXIMAL_TOL + RTOL * np.abs(z_new):
+            return z_new
+        z = z_new
+    return z
 
-    proximal_val = y if sgn == 0 else None
-    function_proximal_val = y if sgn == 0 else None
 
-    if not np.all(sgn * fun_evals_near_bump <= 0):
-        if sgn >= 0:
-            first_index = 0
-            second_index = find_first_greather_than_zero(fun_evals_near_bump, False)
-        else:
-            first_index = find_first_greather_than_zero(-fun_evals_near_bump, True)
-            second_index = -1
-
-        proximal_val = brent_root_finder(
-            _proximal_argument_derivative_loss_double_quad,
-            points_near_bump[first_index],
-            points_near_bump[second_index],
-            PROXIMAL_TOL,
-            RTOL,
-            10000,
-            (y, omega, V, width),
-        )
-        function_proximal_val = _proximal_argument_loss_double_quad(
-            proximal_val, y, omega, V, width
+@njit(error_model="numpy", fastmath=True)
+def _proximal_loss_double_quad(y, omega, V, width, inner, outer, slope_bound):
+    # global minimiser of F among the minima of the convex pieces, the constants
+    # are the ones of _proximal_constants_loss_double_quad(V, width)
+    low = (V * y + omega - V * slope_bound) / (1 + V)
+    high = (V * y + omega + V * slope_bound) / (1 + V)
+    if outer == 0.0:
+        proximal_val = _safeguarded_newton_loss_double_quad(
+            y, omega, V, width, low, high
         )
+    else:
+        proximal_val = 0.0
+        function_proximal_val = np.inf
+        for piece_low, piece_high in (
+            (low, y - outer),
+            (y - inner, y + inner),
+            (y + outer, high),
+        ):
+            piece_low, piece_high = max(piece_low, low), min(piece_high, high)
+            if (
+                piece_low > piece_high
+                or _proximal_argument_derivative_loss_double_quad(
+                    piece_low, y, omega, V, width
+                )
+                > 0
+                or _proximal_argument_derivative_loss_double_quad(
+                    piece_high, y, omega, V, width
+                )
+                < 0
+            ):
+                continue
+            tmp_proximal = _safeguarded_newton_loss_double_quad(
+                y, omega, V, width, piece_low, piece_high
+            )
+            tmp_function_proximal_val = _proximal_argument_loss_double_quad(
+                tmp_proximal, y, omega, V, width
+            )
+            if tmp_function_proximal_val < function_proximal_val:
+                proximal_val = tmp_proximal
+                function_proximal_val = tmp_function_proximal_val
 
-    if not np.all(sgn * fun_evals_near_parabola >= 0):
-        if sgn >= 0:
-            first_index = find_first_greather_than_zero(-fun_evals_near_parabola, True)
-            second_index = -1
-        else:
-            first_index = 0
-            second_index = find_first_greather_than_zero(fun_evals_near_parabola, False)
-
-        tmp_proximal = brent_root_finder(
-            _proximal_argument_derivative_loss_double_quad,
-            points_near_parabola[first_index],
-            points_near_parabola[second_index],
-            PROXIMAL_TOL,
-            RTOL,
-            10000,
-            (y, omega, V, width),
+    proximal_derivative = 1 / (1 + V * DDloss_double_quad(y, proximal_val, width))
+
+    return proximal_val, proximal_derivative
+
+
+@njit(error_model="numpy", fastmath=True)
+def proximal_loss_double_quad(y, omega, V, width):
+    # for many points with the same V and width compute the constants once and
+    # call _proximal_loss_double_quad
+    return _proximal_loss_double_quad(
+        y, omega, V, width, *_proximal_constants_loss_double_quad(V, width)
+    )
+
+
+# -----------------------------------
+
+# The losses depend only on the residual y - z, so prox(y, omega, V) =
+# y + p(omega - y, V) with p(t, V) = prox(0, t, V). For fixed V and width p and
+# dp are tabulated once on a uniform grid of t and interpolated with cubic
+# Hermite polynomials, the slopes at the nodes are the exact dp and
+# ddp = V DDDloss(0, p) dp ** 3, which follows from dp = 1 / (1 + V DDloss(0, p)).
+
+
+@njit(error_model="numpy")
+def _proximals_loss_double_quad_shifts(
+    shifts, V, width, proximals, derivatives, second_derivatives
+):
+    # serial, a table build takes milliseconds and a parallel region here would
+    # start the numba threads in every process that builds one
+    constants = _proximal_constants_loss_double_quad(V, width)
+    for k in range(len(shifts)):
+        proximals[k], derivatives[k] = _proximal_loss_double_quad(
+            0.0, shifts[k], V, width, *constants
         )
-        tmp_function_proximal_val = _proximal_argument_loss_double_quad(
-            tmp_proximal, y, omega, V, width
+        second_derivatives[k] = (
+            V * DDDloss_double_quad(0.0, proximals[k], width) * derivatives[k] ** 3
         )
 
-        if proximal_val is None and function_proximal_val is None:
-            proximal_val = tmp_proximal
-            function_proximal_val = tmp_function_proximal_val
 
-        if function_proximal_val > tmp_function_proximal_val:
-            proximal_val = tmp_proximal
-            function_proximal_val = tmp_function_proximal_val
+def _exact_proximals_loss_double_quad(shifts, V, width):
+    proximals, derivatives = np.empty_like(shifts), np.empty_like(shifts)
+    second_derivatives = np.empty_like(shifts)
+    _proximals_loss_double_quad_shifts(
+        shifts, V, width, proximals, derivatives, second_derivatives
+    )
+    return proximals, derivatives, second_derivatives
+
 
-    proximal_derivative = 1 / (1 + V * DDloss_double_quad(y, proximal_val, width))
+@njit(error_model="numpy")
+def hermite_interpolation(u, step, value_0, slope_0, value_1, slope_1):
+    # cubic Hermite at u in [0, 1] of an interval of length step
+    return (
+        (2 * u ** 3 - 3 * u ** 2 + 1) * value_0
+        + (u ** 3 - 2 * u ** 2 + u) * step * slope_0
+        + (-2 * u ** 3 + 3 * u ** 2) * value_1
+        + (u ** 3 - u ** 2) * step * slope_1
+    )
 
-    return proximal_val, proximal_derivative
+
+@lru_cache(maxsize=PROXIMAL_TABLE_CACHE_SIZE)
+def proximal_table_loss_double_quad(V, width, half_range):
+    # Table of p(t, V) on [-half_range, half_range]. The interpolation error is
+    # measured at the midpoints of the intervals, which then become nodes,
+    # relative to 1 + |p| as the root finder has a relative tolerance. The
+    # intervals still above tolerance at PROXIMAL_TABLE_MAX_POINTS, around a
+    # jump of the proximal of a non convex loss, are marked to be solved exactly.
+    # Returns (first node, step, p, dp, ddp, exact intervals).
+    shifts = np.linspace(-half_range, half_range, PROXIMAL_TABLE_POINTS)
+    table = _exact_proximals_loss_double_quad(shifts, V, width)
+
+    while True:
+        step = shifts[1] - shifts[0]
+        midpoints = 0.5 * (shifts[:-1] + shifts[1:])
+        mid_table = _exact_proximals_loss_double_quad(midpoints, V, width)
+        interp_proximals, interp_derivatives = [
+            hermite_interpolation(
+                0.5, step, values[:-1], slopes[:-1], values[1:], slopes[1:]
+            )
+            for values, slopes in (table[:2], table[1:])
+        ]
+        inaccurate = np.maximum(
+            np.abs(mid_table[0] - interp_proximals),
+            np.abs(mid_table[1] - interp_derivatives),
+        ) > PROXIMAL_TABLE_TOL * (1 + np.abs(mid_table[0]))
+
+        indices = np.arange(1, len(shifts))
+        shifts = np.insert(shifts, indices, midpoints)
+        table = [
+            np.insert(values, indices, mid_values)
+            for values, mid_values in zip(table, mid_table)
+        ]
+        exact = np.repeat(inaccurate, 2)
+
+        if not np.any(inaccurate) or 2 * len(shifts) - 1 > PROXIMAL_TABLE_MAX_POINTS:
+            break
+
+    for array in table + [exact]:
+        array.flags.writeable = False
+    return (shifts[0], shifts[1] - shifts[0], *table, exact)
+
+
+# -----------------------------------
+
+# Losses of the residual y - z, given as jitted loss(y, z, *params) with its
+# first and second derivatives in the residual like loss_double_quad. For a
+# loss increasing in |y - z| the proximal objective F(z) = (z - omega)^2 / 2V +
+# loss(y, z) decreases below min(y, omega) and increases above max(y, omega),
+# so all its minima are in between. The generated proximal scans F' there on
+# PROXIMAL_SCAN_POINTS intervals, solves each sign change from - to + with
+# safeguarded Newton and keeps the lowest F. Basins narrower than an interval
+# can be missed, a loss with known curvature can register its own proximal.
+
+LOSSES = {}
+
+
+def make_proximal(loss, Dloss, DDloss):
+    @njit(error_model="numpy", fastmath=True)
+    def proximal_argument_derivative(z, y, omega, V, params):
+        return (z - omega) / V - Dloss(y, z, *params)
+
+    @njit(error_model="numpy", fastmath=True)
+    def safeguarded_newton(y, omega, V, params, low, high, start):
+        z = min(max(start, low), high)
+        for _ in range(MAX_NEWTON_STEPS):
+            derivative = proximal_argument_derivative(z, y, omega, V, params)
+            if derivative > 0:
+                high = z
+            else:
+                low = z
+            z_new = z - derivative / (1 / V + DDloss(y, z, *params))
+            if not low <= z_new <= high:
+                z_new = 0.5 * (low + high)
+            if np.abs(z_new - z) <= PROXIMAL_TOL + RTOL * np.abs(z_new):
+                return z_new
+            z = z_new
+        return z
+
+    @njit(error_model="numpy", fastmath=True)
+    def proximal(y, omega, V, *params):
+        low, high = min(y, omega), max(y, omega)
+        start = (V * y + omega) / (1 + V)
+        step = (high - low) / PROXIMAL_SCAN_POINTS
+
+        proximal_val = start
+        function_proximal_val = np.inf
+        z_left = low
+        derivative_left = proximal_argument_derivative(low, y, omega, V, params)
+        for k in range(1, PROXIMAL_SCAN_POINTS + 1):
+            z_right = high if k == PROXIMAL_SCAN_POINTS else low + k * step
+            derivative_right = proximal_argument_derivative(
+                z_right, y, omega, V, params
+            )
+            if derivative_left <= 0 <= derivative_right:
+                tmp_proximal = safeguarded_newton(
+                    y, omega, V, params, z_left, z_right, start
+                )
+                tmp_function_proximal_val = 0.5 * (
+                    tmp_proximal - omega
+                ) ** 2 / V + loss(y, tmp_proximal, *params)
+                if tmp_function_proximal_val < function_proximal_val:
+                    proximal_val = tmp_proximal
+                    function_proximal_val = tmp_function_proximal_val
+            z_left, derivative_left = z_right, derivative_right
+
+        proximal_derivative = 1 / (1 + V * DDloss(y, proximal_val, *params))
+
+        return proximal_val, proximal_derivative
+
+    return proximal
+
+
+def register_loss(name, loss, Dloss, DDloss, proximal=None):
+    # proximal(y, omega, V, *params) returns the proximal and its derivative in
+    # omega, it is generated from the loss if not given. The names of params
+    # are the ones of loss after y and z.
+    LOSSES[name] = {
+        "loss": loss,
+        "Dloss": Dloss,
+        "DDloss": DDloss,
+        "proximal": (
+            make_proximal(loss, Dloss, DDloss) if proximal is None else proximal
+        ),
+        "params": tuple(list(signature(getattr(loss, "py_func", loss)).parameters)[2:]),
+    }
+    return LOSSES[name]
+
+
+register_loss("l2", loss_l2, Dloss_l2, DDloss_l2)
+register_loss(
+    "double_quad",
+    loss_double_quad,
+    Dloss_double_quad,
+    DDloss_double_quad,
+    proximal=proximal_loss_double_quad,
+)
@@ -1,20 +1,32 @@
 import numpy as np
-from scipy.integrate import dblquad
-from numba import njit, vectorize
-from src.loss_functions import proximal_loss_double_quad
+from functools import lru_cache
+import numba
+from numba import njit, prange, vectorize
+from src.loss_functions import (
+    LOSSES,
+    _proximal_constants_loss_double_quad,
+    _proximal_loss_double_quad,
+    proximal_table_loss_double_quad,
+    hermite_interpolation,
+)
 from src.integration_utils import (
-    find_integration_borders_square,
+    dblquad_backend,
+    quad_backend,
+    integration_borders,
     divide_integration_borders_grid,
     domains_double_line_constraint,
     domains_double_line_constraint_only_inside,
-    double_romb_integration,
-    precompute_values_double_romb_integration,
     romberg_linspace,
+    romberg_grid_context,
+    tiled_romb_integration,
+    ROMBERG_MAX_MEMORY,
 )
 
 MULT_INTEGRAL = 14
 EPSABS = 1e-9
 EPSREL = 1e-9
+# panel edges of the semi-analytic integrals, in units of the std of each component
+SEMI_ANALYTIC_PANEL_EDGES = np.array([1.0, 2.0, 4.0, 8.0, MULT_INTEGRAL])
 
 
 @njit(error_model="numpy", fastmath=True)
@@ -22,26 +34,200 @@ def _gaussian_function(y, x):
     return np.exp(-(x ** 2) / 2) / np.sqrt(2 * np.pi)
 
 
-def precompute_proximals_loss_double_quad_grid(
-    x_range, y_range, m, q, sigma, width,
-):
-    # create the array if it is not there
-
-    shape = (len(x_range), len(y_range))
-    proximals = np.empty(shape)
-    proximal_derivatives = np.empty(shape)
-
-    with np.nditer(
-        [proximals, proximal_derivatives], flags=["multi_index"], op_flags=["readwrite"]
-    ) as it:
-        for prox, prox_der in it:
-            prox[...], prox_der[...] = proximal_loss_double_quad(
-                y_range[it.multi_index[0]],
-                np.sqrt(q) * x_range[it.multi_index[1]],
-                sigma,
-                width,
+@njit(error_model="numpy")
+def _proximals_loss_double_quad_grid(
+    x_range, y_range, sqrt_q, sigma, width, proximals, proximal_derivatives
+):
+    # each point is independent, the rows are split among the threads in the
+    # parallel build and prange is a plain range in this one
+    constants = _proximal_constants_loss_double_quad(sigma, width)
+    for i in prange(len(y_range)):
+        for j in range(len(x_range)):
+            proximals[i, j], proximal_derivatives[i, j] = _proximal_loss_double_quad(
+                y_range[i], sqrt_q * x_range[j], sigma, width, *constants
             )
 
+
+# The parallel builds are compiled apart and only run when n_threads > 1: once a
+# numba parallel region has run, a process that forks a Pool hangs at exit, and
+# inside Pool workers the threads would oversubscribe the cores.
+_parallel_proximals_loss_double_quad_grid = njit(error_model="numpy", parallel=True)(
+    _proximals_loss_double_quad_grid.py_func
+)
+
+
+def _run_on_threads(serial_kernel, parallel_kernel, n_threads, *args):
+    n_threads = min(n_threads, numba.config.NUMBA_NUM_THREADS)
+    if n_threads <= 1:
+        return serial_kernel(*args)
+    previous_n_threads = numba.get_num_threads()
+    numba.set_num_threads(n_threads)
+    try:
+        return parallel_kernel(*args)
+    finally:
+        numba.set_num_threads(previous_n_threads)
+
+
+def precompute_proximals_loss_double_quad_grid(
+    x_range, y_range, m, q, sigma, width, dtype=np.float64, out=None, n_threads=1
+):
+    # rows are y and columns are xi, y_range can be a block of rows of the grid.
+    # out are the (proximals, proximal_derivatives) arrays to fill, if given.
+    # n_threads > 1 fills the rows on that many numba threads, it goes in the
+    # loss_args of the hat equations.
+    if out is None:
+        shape = (len(y_range), len(x_range))
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    proximals, proximal_derivatives = out
+
+    _run_on_threads(
+        _proximals_loss_double_quad_grid,
+        _parallel_proximals_loss_double_quad_grid,
+        n_threads,
+        x_range,
+        y_range,
+        np.sqrt(q),
+        sigma,
+        width,
+        proximals,
+        proximal_derivatives,
+    )
+    return proximals, proximal_derivatives
+
+
+@lru_cache(maxsize=None)
+def _proximals_grid_kernel(proximal):
+    # serial and parallel builds of the grid kernel of a registered proximal
+    def proximals_grid(
+        x_range, y_range, sqrt_q, sigma, loss_params, proximals, proximal_derivatives
+    ):
+        for i in prange(len(y_range)):
+            for j in range(len(x_range)):
+                proximals[i, j], proximal_derivatives[i, j] = proximal(
+                    y_range[i], sqrt_q * x_range[j], sigma, *loss_params
+                )
+
+    return (
+        njit(error_model="numpy")(proximals_grid),
+        njit(error_model="numpy", parallel=True)(proximals_grid),
+    )
+
+
+def precompute_proximals_grid(
+    x_range,
+    y_range,
+    m,
+    q,
+    sigma,
+    loss_name,
+    dtype=np.float64,
+    out=None,
+    n_threads=1,
+    **loss_args
+):
+    # Same as precompute_proximals_loss_double_quad_grid for any loss of
+    # loss_functions.LOSSES, loss_args are the parameters of the loss by name,
+    # e.g. loss_args = {"loss_name": "double_quad", "width": 0.5}.
+    loss = LOSSES[loss_name]
+    if out is None:
+        shape = (len(y_range), len(x_range))
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    proximals, proximal_derivatives = out
+
+    _run_on_threads(
+        *_proximals_grid_kernel(loss["proximal"]),
+        n_threads,
+        x_range,
+        y_range,
+        np.sqrt(q),
+        sigma,
+        tuple(float(loss_args[name]) for name in loss["params"]),
+        proximals,
+        proximal_derivatives,
+    )
+    return proximals, proximal_derivatives
+
+
+@njit(error_model="numpy")
+def _proximals_loss_double_quad_table(
+    x_range,
+    y_range,
+    sqrt_q,
+    sigma,
+    width,
+    first_shift,
+    step,
+    table_proximals,
+    table_derivatives,
+    table_second_derivatives,
+    exact,
+    proximals,
+    proximal_derivatives,
+):
+    constants = _proximal_constants_loss_double_quad(sigma, width)
+    for i in prange(len(y_range)):
+        for j in range(len(x_range)):
+            omega = sqrt_q * x_range[j]
+            position = (omega - y_range[i] - first_shift) / step
+            k = int(np.floor(position))
+            if k < 0 or k >= len(table_proximals) - 1 or exact[k]:
+                proximals[i, j], proximal_derivatives[i, j] = (
+                    _proximal_loss_double_quad(
+                        y_range[i], omega, sigma, width, *constants
+                    )
+                )
+            else:
+                proximals[i, j] = y_range[i] + hermite_interpolation(
+                    position - k,
+                    step,
+                    table_proximals[k],
+                    table_derivatives[k],
+                    table_proximals[k + 1],
+                    table_derivatives[k + 1],
+                )
+                proximal_derivatives[i, j] = hermite_interpolation(
+                    position - k,
+                    step,
+                    table_derivatives[k],
+                    table_second_derivatives[k],
+                    table_derivatives[k + 1],
+                    table_second_derivatives[k + 1],
+                )
+
+
+_parallel_proximals_loss_double_quad_table = njit(error_model="numpy", parallel=True)(
+    _proximals_loss_double_quad_table.py_func
+)
+
+
+def precompute_proximals_loss_double_quad_table(
+    x_range, y_range, m, q, sigma, width, dtype=np.float64, out=None, n_threads=1
+):
+    # Same as precompute_proximals_loss_double_quad_grid, served from the 1-D
+    # table of the proximal in omega - y. The half range of the table is
+    # rounded up to a power of two so that the blocks of a grid share it.
+    if out is None:
+        shape = (len(y_range), len(x_range))
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    proximals, proximal_derivatives = out
+
+    half_range = np.sqrt(q) * np.max(np.abs(x_range)) + np.max(np.abs(y_range))
+    table = proximal_table_loss_double_quad(
+        float(sigma), float(width), float(2 ** np.ceil(np.log2(half_range)))
+    )
+    _run_on_threads(
+        _proximals_loss_double_quad_table,
+        _parallel_proximals_loss_double_quad_table,
+        n_threads,
+        x_range,
+        y_range,
+        np.sqrt(q),
+        sigma,
+        width,
+        *table,
+        proximals,
+        proximal_derivatives
+    )
     return proximals, proximal_derivatives
 
 
@@ -795,6 +981,208 @@ def sigma_integral_Huber_decorrelated_noise(
     )
 
 
+# --------------
+# Fused integrands, the Bayes channel is evaluated once for m, q and sigma
+# --------------
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L2_single_noise(y, xi, q, m, sigma, delta):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta)
+    )
+    fout = foutL2(y, omega, sigma)
+    return (
+        weight * foutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta) * fout,
+        weight * fout ** 2,
+        weight * DfoutL2(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L1_single_noise(y, xi, q, m, sigma, delta):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta)
+    )
+    fout = foutL1(y, omega, sigma)
+    return (
+        weight * foutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta) * fout,
+        weight * fout ** 2,
+        weight * DfoutL1(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_Huber_single_noise(y, xi, q, m, sigma, delta, a):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta)
+    )
+    fout = foutHuber(y, omega, sigma, a)
+    return (
+        weight * foutBayes_single_noise(y, np.sqrt(eta) * xi, (1 - eta), delta) * fout,
+        weight * fout ** 2,
+        weight * DfoutHuber(y, omega, sigma, a),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L2_double_noise(y, xi, q, m, sigma, delta_small, delta_large, eps):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+    )
+    fout = foutL2(y, omega, sigma)
+    return (
+        weight
+        * foutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutL2(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L1_double_noise(y, xi, q, m, sigma, delta_small, delta_large, eps):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+    )
+    fout = foutL1(y, omega, sigma)
+    return (
+        weight
+        * foutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutL1(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_Huber_double_noise(
+    y, xi, q, m, sigma, delta_small, delta_large, eps, a
+):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+    )
+    fout = foutHuber(y, omega, sigma, a)
+    return (
+        weight
+        * foutBayes_double_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutHuber(y, omega, sigma, a),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L2_decorrelated_noise(
+    y, xi, q, m, sigma, delta_small, delta_large, eps, beta
+):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+    )
+    fout = foutL2(y, omega, sigma)
+    return (
+        weight
+        * foutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutL2(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_L1_decorrelated_noise(
+    y, xi, q, m, sigma, delta_small, delta_large, eps, beta
+):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+    )
+    fout = foutL1(y, omega, sigma)
+    return (
+        weight
+        * foutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutL1(y, omega, sigma),
+    )
+
+
+@njit(error_model="numpy", fastmath=True)
+def hat_integrals_Huber_decorrelated_noise(
+    y, xi, q, m, sigma, delta_small, delta_large, eps, beta, a
+):
+    eta = m ** 2 / q
+    omega = np.sqrt(q) * xi
+    weight = (
+        np.exp(-(xi ** 2) / 2)
+        / np.sqrt(2 * np.pi)
+        * ZoutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+    )
+    fout = foutHuber(y, omega, sigma, a)
+    return (
+        weight
+        * foutBayes_decorrelated_noise(
+            y, np.sqrt(eta) * xi, (1 - eta), delta_small, delta_large, eps, beta
+        )
+        * fout,
+        weight * fout ** 2,
+        weight * DfoutHuber(y, omega, sigma, a),
+    )
+
+
 # -----------
 
 
@@ -835,13 +1223,14 @@ def test_fun_down_Huber(y, m, q, sigma, a):
 # ------------------
 
 
-def q_hat_equation_BO_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_BO_single_noise(y, xi, q, m, sigma, delta),
+def q_hat_equation_BO_single_noise(m, q, sigma, delta, integration_backend="dblquad"):
+    borders = integration_borders(
+        q_integral_BO_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         q_integral_BO_single_noise,
         borders[0][0],
         borders[0][1],
@@ -858,13 +1247,14 @@ def q_hat_equation_BO_single_noise(m, q, sigma, delta):
 # ------------------
 
 
-def m_hat_equation_L2_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L2_single_noise(y, xi, q, m, sigma, delta),
+def m_hat_equation_L2_single_noise(m, q, sigma, delta, integration_backend="dblquad"):
+    borders = integration_borders(
+        m_integral_L2_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         m_integral_L2_single_noise,
         borders[0][0],
         borders[0][1],
@@ -876,13 +1266,14 @@ def m_hat_equation_L2_single_noise(m, q, sigma, delta):
     )[0]
 
 
-def q_hat_equation_L2_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L2_single_noise(y, xi, q, m, sigma, delta),
+def q_hat_equation_L2_single_noise(m, q, sigma, delta, integration_backend="dblquad"):
+    borders = integration_borders(
+        q_integral_L2_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         q_integral_L2_single_noise,
         borders[0][0],
         borders[0][1],
@@ -894,13 +1285,16 @@ def q_hat_equation_L2_single_noise(m, q, sigma, delta):
     )[0]
 
 
-def sigma_hat_equation_L2_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_L2_single_noise(y, xi, q, m, sigma, delta),
+def sigma_hat_equation_L2_single_noise(
+    m, q, sigma, delta, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        sigma_integral_L2_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         sigma_integral_L2_single_noise,
         borders[0][0],
         borders[0][1],
@@ -917,11 +1311,12 @@ def sigma_hat_equation_L2_single_noise(m, q, sigma, delta):
 # ------------------
 
 
-def m_hat_equation_L1_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L1_single_noise(y, xi, q, m, sigma, delta),
+def m_hat_equation_L1_single_noise(m, q, sigma, delta, integration_backend="dblquad"):
+    borders = integration_borders(
+        m_integral_L1_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -931,7 +1326,7 @@ def m_hat_equation_L1_single_noise(m, q, sigma, delta):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_L1_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -945,11 +1340,12 @@ def m_hat_equation_L1_single_noise(m, q, sigma, delta):
     return integral_value
 
 
-def q_hat_equation_L1_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_single_noise(y, xi, q, m, sigma, delta),
+def q_hat_equation_L1_single_noise(m, q, sigma, delta, integration_backend="dblquad"):
+    borders = integration_borders(
+        q_integral_L1_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -959,7 +1355,7 @@ def q_hat_equation_L1_single_noise(m, q, sigma, delta):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_L1_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -973,11 +1369,14 @@ def q_hat_equation_L1_single_noise(m, q, sigma, delta):
     return integral_value
 
 
-def sigma_hat_equation_L1_single_noise(m, q, sigma, delta):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_single_noise(y, xi, q, m, sigma, delta),
+def sigma_hat_equation_L1_single_noise(
+    m, q, sigma, delta, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_L1_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -987,7 +1386,7 @@ def sigma_hat_equation_L1_single_noise(m, q, sigma, delta):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_L1_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1006,11 +1405,14 @@ def sigma_hat_equation_L1_single_noise(m, q, sigma, delta):
 # ------------------
 
 
-def m_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_Huber_single_noise(y, xi, q, m, sigma, delta, a),
+def m_hat_equation_Huber_single_noise(
+    m, q, sigma, delta, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        m_integral_Huber_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1026,7 +1428,7 @@ def m_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_Huber_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1040,11 +1442,14 @@ def m_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
     return integral_value
 
 
-def q_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_Huber_single_noise(y, xi, q, m, sigma, delta, a),
+def q_hat_equation_Huber_single_noise(
+    m, q, sigma, delta, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_Huber_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1060,7 +1465,7 @@ def q_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_Huber_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1074,11 +1479,14 @@ def q_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
     return integral_value
 
 
-def sigma_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_Huber_single_noise(y, xi, q, m, sigma, delta, a),
+def sigma_hat_equation_Huber_single_noise(
+    m, q, sigma, delta, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        sigma_integral_Huber_single_noise,
         np.sqrt((1 + delta)),
         1.0,
+        args=(q, m, sigma, delta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1094,7 +1502,7 @@ def sigma_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_Huber_single_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1109,66 +1517,213 @@ def sigma_hat_equation_Huber_single_noise(m, q, sigma, delta, a):
 
 
 # ------------------
-# Numerical Loss equations single noise
+# Numerical Loss equations
 # ------------------
 
 
-def hat_equations_numerical_loss_single_noise(
-    m, q, sigma, delta, precompute_proximal_func, loss_args
-):
-    x_range = romberg_linspace(
-        -MULT_INTEGRAL * np.sqrt((1 + delta)), MULT_INTEGRAL * np.sqrt((1 + delta))
-    )  # np.linspace(borders[0][0], borders[0][1], 2 ** K_ROMBERG + 1)
-    y_range = romberg_linspace(
-        -MULT_INTEGRAL * np.sqrt((1 + delta)), MULT_INTEGRAL * np.sqrt((1 + delta))
+@lru_cache(maxsize=None)
+def _hat_integrals_numerical_loss_block(ZoutBayes_erm, foutBayes_erm):
+    # block kernel of the noise model with the channel functions
+    # ZoutBayes_erm(y, xi, m, q, sigma, *noise_args) and foutBayes_erm
+    @njit(error_model="numpy")
+    def block_integrals(
+        x_range,
+        y_block,
+        proximals,
+        proximal_derivatives,
+        gaussian_weights_x,
+        weights_y,
+        m,
+        q,
+        sigma,
+        noise_args,
+    ):
+        # m, q and sigma integrands on a block of rows, summed with the weights
+        m_int, q_int, sigma_int = 0.0, 0.0, 0.0
+        for i in range(len(y_block)):
+            m_row, q_row, sigma_row = 0.0, 0.0, 0.0
+            for j in range(len(x_range)):
+                weight = gaussian_weights_x[j] * ZoutBayes_erm(
+                    y_block[i], x_range[j], m, q, sigma, *noise_args
+                )
+                fout = (proximals[i, j] - np.sqrt(q) * x_range[j]) / sigma
+                m_row += (
+                    weight
+                    * foutBayes_erm(y_block[i], x_range[j], m, q, sigma, *noise_args)
+                    * fout
+                )
+                q_row += weight * fout ** 2
+                sigma_row += weight * (proximal_derivatives[i, j] - 1) / sigma
+            m_int += weights_y[i] * m_row
+            q_int += weights_y[i] * q_row
+            sigma_int += weights_y[i] * sigma_row
+        return m_int, q_int, sigma_int
+
+    return block_integrals
+
+
+def numerical_loss_grid_context(delta, dtype=np.float64, max_memory=ROMBERG_MAX_MEMORY):
+    # Romberg grid of the numerical loss hat equations, it only depends on the
+    # noise, so it is built once per sweep and passed in var_hat_kwargs. delta
+    # is the largest variance of y minus one. The two scratch buffers hold the
+    # proximals of a block, dtype=np.float32 halves their memory.
+    border = MULT_INTEGRAL * np.sqrt((1 + delta))
+    grid_context = romberg_grid_context(
+        -border, border, n_buffers=2, dtype=dtype, max_memory=max_memory
+    )
+    grid_context["gaussian_weights_x"] = (
+        grid_context["weights_x"]
+        * np.exp(-(grid_context["x_range"] ** 2) / 2)
+        / np.sqrt(2 * np.pi)
     )
+    return grid_context
 
-    dx = x_range[1] - x_range[0]
-    dy = y_range[1] - y_range[0]
-
-    Xi, _ = np.meshgrid(x_range, y_range)
 
-    precom_gaussian = precompute_values_double_romb_integration(
-        _gaussian_function, x_range, y_range
-    )
+def _hat_equations_numerical_loss(
+    m,
+    q,
+    sigma,
+    ZoutBayes_erm,
+    foutBayes_erm,
+    noise_args,
+    precompute_proximal_func,
+    loss_args,
+    grid_context,
+    full_output,
+):
+    # The Romberg grid is streamed in blocks of rows of y, only the proximals of
+    # one block are in memory. precompute_proximal_func(x_range, y_block, m, q,
+    # sigma, out=buffers, **loss_args) fills the buffers of the grid context.
+    x_range, y_range = grid_context["x_range"], grid_context["y_range"]
+    kernel = _hat_integrals_numerical_loss_block(ZoutBayes_erm, foutBayes_erm)
+
+    def block_integrals(start, stop, buffers):
+        proximals, proximal_derivatives = precompute_proximal_func(
+            x_range, y_range[start:stop], m, q, sigma, out=buffers, **loss_args
+        )
+        return kernel(
+            x_range,
+            y_range[start:stop],
+            proximals,
+            proximal_derivatives,
+            grid_context["gaussian_weights_x"],
+            grid_context["weights_y"][start:stop],
+            m,
+            q,
+            sigma,
+            noise_args,
+        )
 
-    precom_proximal, precom_Dproximal = precompute_proximal_func(
-        x_range, y_range, m, q, sigma, **loss_args,
-    )
+    m_int, q_int, sigma_int = tiled_romb_integration(block_integrals, grid_context)
+    if full_output:
+        return (
+            (m_int, q_int, sigma_int),
+            {
+                "block_rows": grid_context["block_rows"],
+                "peak_memory": grid_context["peak_memory"],
+            },
+        )
+    return m_int, q_int, sigma_int
 
-    precom_fout = (precom_proximal - np.sqrt(q) * Xi) / sigma
-    precom_Dfout = (precom_Dproximal - 1) / sigma
 
-    precom_Zout = precompute_values_double_romb_integration(
-        _ZoutBayes_single_noise_erm, x_range, y_range, args=[m, q, sigma, delta]
-    )
-    precom_foutBayes = precompute_values_double_romb_integration(
-        _foutBayes_single_noise_erm, x_range, y_range, args=[m, q, sigma, delta]
+def hat_equations_numerical_loss_single_noise(
+    m,
+    q,
+    sigma,
+    delta,
+    precompute_proximal_func,
+    loss_args,
+    grid_context=None,
+    full_output=False,
+):
+    if grid_context is None:
+        grid_context = numerical_loss_grid_context(delta)
+    return _hat_equations_numerical_loss(
+        m,
+        q,
+        sigma,
+        _ZoutBayes_single_noise_erm,
+        _foutBayes_single_noise_erm,
+        (float(delta),),
+        precompute_proximal_func,
+        loss_args,
+        grid_context,
+        full_output,
+    )
+
+
+def hat_equations_numerical_loss_double_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    percentage,
+    precompute_proximal_func,
+    loss_args,
+    grid_context=None,
+    full_output=False,
+):
+    if grid_context is None:
+        grid_context = numerical_loss_grid_context(max(delta_small, delta_large))
+    return _hat_equations_numerical_loss(
+        m,
+        q,
+        sigma,
+        _ZoutBayes_double_noise_erm,
+        _foutBayes_double_noise_erm,
+        (float(delta_small), float(delta_large), float(percentage)),
+        precompute_proximal_func,
+        loss_args,
+        grid_context,
+        full_output,
+    )
+
+
+def hat_equations_numerical_loss_decorrelated_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    percentage,
+    beta,
+    precompute_proximal_func,
+    loss_args,
+    grid_context=None,
+    full_output=False,
+):
+    if grid_context is None:
+        grid_context = numerical_loss_grid_context(
+            max(delta_small, beta ** 2 + delta_large - 1)
+        )
+    return _hat_equations_numerical_loss(
+        m,
+        q,
+        sigma,
+        _ZoutBayes_decorrelated_noise_erm,
+        _foutBayes_decorrelated_noise_erm,
+        (float(delta_small), float(delta_large), float(percentage), float(beta)),
+        precompute_proximal_func,
+        loss_args,
+        grid_context,
+        full_output,
     )
 
-    m_hat_values = precom_gaussian * precom_Zout * precom_foutBayes * precom_fout
-    q_hat_values = precom_gaussian * precom_Zout * precom_fout * precom_fout
-    sigma_hat_values = precom_gaussian * precom_Zout * precom_Dfout
-
-    m_hat_integral = double_romb_integration(m_hat_values, dx, dy)
-    q_hat_integral = double_romb_integration(q_hat_values, dx, dy)
-    sigma_hat_integral = double_romb_integration(sigma_hat_values, dx, dy)
-
-    return m_hat_integral, q_hat_integral, sigma_hat_integral
-
 
 # ------------------
 # BayesOpt equations double noise
 # ------------------
 
 
-def q_hat_equation_BO_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_BO_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def q_hat_equation_BO_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_BO_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     # domain_xi, domain_y = divide_integration_borders_grid(borders)
@@ -1188,7 +1743,7 @@ def q_hat_equation_BO_double_noise(m, q, sigma, delta_small, delta_large, eps):
 
     # return integral_value
 
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         q_integral_BO_double_noise,
         borders[0][0],
         borders[0][1],
@@ -1205,20 +1760,21 @@ def q_hat_equation_BO_double_noise(m, q, sigma, delta_small, delta_large, eps):
 # ------------------
 
 
-def m_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def m_hat_equation_L2_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        m_integral_L2_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_L2_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1232,20 +1788,21 @@ def m_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, eps):
     return integral_value
 
 
-def q_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def q_hat_equation_L2_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_L2_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_L2_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1259,20 +1816,21 @@ def q_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, eps):
     return integral_value
 
 
-def sigma_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def sigma_hat_equation_L2_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        sigma_integral_L2_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_L2_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1291,13 +1849,14 @@ def sigma_hat_equation_L2_double_noise(m, q, sigma, delta_small, delta_large, ep
 # ------------------
 
 
-def m_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L1_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def m_hat_equation_L1_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        m_integral_L1_double_noise,
         np.sqrt((1 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1307,7 +1866,7 @@ def m_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_L1_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1321,13 +1880,14 @@ def m_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
     return integral_value
 
 
-def q_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def q_hat_equation_L1_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_L1_double_noise,
         np.sqrt((1 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1337,7 +1897,7 @@ def q_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_L1_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1351,13 +1911,14 @@ def q_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
     return integral_value
 
 
-def sigma_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, eps):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps
-        ),
+def sigma_hat_equation_L1_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_L1_double_noise,
         np.sqrt((1 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1367,7 +1928,7 @@ def sigma_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, ep
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_L1_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1386,13 +1947,14 @@ def sigma_hat_equation_L1_double_noise(m, q, sigma, delta_small, delta_large, ep
 # ------------------
 
 
-def m_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_Huber_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, a
-        ),
+def m_hat_equation_Huber_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        m_integral_Huber_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1408,7 +1970,7 @@ def m_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_Huber_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1422,13 +1984,14 @@ def m_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps
     return integral_value
 
 
-def q_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_Huber_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, a
-        ),
+def q_hat_equation_Huber_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        q_integral_Huber_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1444,7 +2007,7 @@ def q_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_Huber_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1458,13 +2021,14 @@ def q_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps
     return integral_value
 
 
-def sigma_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large, eps, a):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_Huber_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, a
-        ),
+def sigma_hat_equation_Huber_double_noise(
+    m, q, sigma, delta_small, delta_large, eps, a, integration_backend="dblquad"
+):
+    borders = integration_borders(
+        sigma_integral_Huber_double_noise,
         np.sqrt((1 + max(delta_small, delta_large))),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1480,7 +2044,7 @@ def sigma_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large,
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_Huber_double_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1500,14 +2064,13 @@ def sigma_hat_equation_Huber_double_noise(m, q, sigma, delta_small, delta_large,
 
 
 def q_hat_equation_BO_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_BO_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        q_integral_BO_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     # domain_xi, domain_y = divide_integration_borders_grid(borders)
@@ -1525,7 +2088,7 @@ def q_hat_equation_BO_decorrelated_noise(
 
     # return integral_value
 
-    return dblquad(
+    return dblquad_backend(integration_backend)(
         q_integral_BO_decorrelated_noise,
         borders[0][0],
         borders[0][1],
@@ -1543,22 +2106,21 @@ def q_hat_equation_BO_decorrelated_noise(
 
 
 def m_hat_equation_L2_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        m_integral_L2_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
-            m_integral_L2_double_noise,
+        integral_value += dblquad_backend(integration_backend)(
+            m_integral_L2_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
             y_funs[0],
@@ -1570,22 +2132,21 @@ def m_hat_equation_L2_decorrelated_noise(
 
 
 def q_hat_equation_L2_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        q_integral_L2_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
-            q_integral_L2_double_noise,
+        integral_value += dblquad_backend(integration_backend)(
+            q_integral_L2_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
             y_funs[0],
@@ -1597,22 +2158,21 @@ def q_hat_equation_L2_decorrelated_noise(
 
 
 def sigma_hat_equation_L2_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_L2_double_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        sigma_integral_L2_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     domain_xi, domain_y = divide_integration_borders_grid(borders)
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
-            sigma_integral_L2_double_noise,
+        integral_value += dblquad_backend(integration_backend)(
+            sigma_integral_L2_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
             y_funs[0],
@@ -1629,14 +2189,13 @@ def sigma_hat_equation_L2_decorrelated_noise(
 
 
 def m_hat_equation_L1_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_L1_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + delta_large)),
+    borders = integration_borders(
+        m_integral_L1_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1646,7 +2205,7 @@ def m_hat_equation_L1_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_L1_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1661,14 +2220,13 @@ def m_hat_equation_L1_decorrelated_noise(
 
 
 def q_hat_equation_L1_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + delta_large)),
+    borders = integration_borders(
+        q_integral_L1_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1678,7 +2236,7 @@ def q_hat_equation_L1_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_L1_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1693,14 +2251,13 @@ def q_hat_equation_L1_decorrelated_noise(
 
 
 def sigma_hat_equation_L1_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta
+    m, q, sigma, delta_small, delta_large, eps, beta, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_L1_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta
-        ),
-        np.sqrt((1 + delta_large)),
+    borders = integration_borders(
+        q_integral_L1_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
     )
 
     args = {"m": m, "q": q, "sigma": sigma}
@@ -1710,7 +2267,7 @@ def sigma_hat_equation_L1_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_L1_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1730,14 +2287,13 @@ def sigma_hat_equation_L1_decorrelated_noise(
 
 
 def m_hat_equation_Huber_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta, a
+    m, q, sigma, delta_small, delta_large, eps, beta, a, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: m_integral_Huber_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta, a
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        m_integral_Huber_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1753,7 +2309,7 @@ def m_hat_equation_Huber_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             m_integral_Huber_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1766,14 +2322,13 @@ def m_hat_equation_Huber_decorrelated_noise(
 
 
 def q_hat_equation_Huber_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta, a
+    m, q, sigma, delta_small, delta_large, eps, beta, a, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: q_integral_Huber_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta, a
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        q_integral_Huber_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1789,7 +2344,7 @@ def q_hat_equation_Huber_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             q_integral_Huber_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1802,14 +2357,13 @@ def q_hat_equation_Huber_decorrelated_noise(
 
 
 def sigma_hat_equation_Huber_decorrelated_noise(
-    m, q, sigma, delta_small, delta_large, eps, beta, a
+    m, q, sigma, delta_small, delta_large, eps, beta, a, integration_backend="dblquad"
 ):
-    borders = find_integration_borders_square(
-        lambda y, xi: sigma_integral_Huber_decorrelated_noise(
-            y, xi, q, m, sigma, delta_small, delta_large, eps, beta, a
-        ),
-        np.sqrt((1 + max(delta_small, delta_large))),
+    borders = integration_borders(
+        sigma_integral_Huber_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
         1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta, a),
     )
 
     args = {"m": m, "q": q, "sigma": sigma, "a": a}
@@ -1825,7 +2379,7 @@ def sigma_hat_equation_Huber_decorrelated_noise(
 
     integral_value = 0.0
     for xi_funs, y_funs in zip(domain_xi, domain_y):
-        integral_value += dblquad(
+        integral_value += dblquad_backend(integration_backend)(
             sigma_integral_Huber_decorrelated_noise,
             xi_funs[0],
             xi_funs[1],
@@ -1835,3 +2389,537 @@ def sigma_hat_equation_Huber_decorrelated_noise(
         )[0]
 
     return integral_value
+
+
+# ------------------
+# Fused hat equations, one border scan and one integration for m, q and sigma
+# ------------------
+
+
+def hat_equations_L2_single_noise(
+    m, q, sigma, delta, integration_backend="dblquad", semi_analytic=False
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL2(r, 0.0, sigma),
+            lambda r: DfoutL2(r, 0.0, sigma),
+            [],
+            _channel_mixture_single_noise(m, q, delta),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L2_single_noise,
+        np.sqrt((1 + delta)),
+        1.0,
+        args=(q, m, sigma, delta),
+    )
+
+    domain_xi, domain_y = [borders[0]], [borders[1]]
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L2_single_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_L1_single_noise(
+    m, q, sigma, delta, integration_backend="dblquad", semi_analytic=False
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL1(r, 0.0, sigma),
+            lambda r: DfoutL1(r, 0.0, sigma),
+            [-sigma, sigma],
+            _channel_mixture_single_noise(m, q, delta),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L1_single_noise,
+        np.sqrt((1 + delta)),
+        1.0,
+        args=(q, m, sigma, delta),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_L1,
+        border_minus_L1,
+        test_fun_upper_L1,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L1_single_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_Huber_single_noise(
+    m, q, sigma, delta, a, integration_backend="dblquad", semi_analytic=False
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutHuber(r, 0.0, sigma, a),
+            lambda r: DfoutHuber(r, 0.0, sigma, a),
+            [-a * (1 + sigma), a * (1 + sigma)],
+            _channel_mixture_single_noise(m, q, delta),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_Huber_single_noise,
+        np.sqrt((1 + delta)),
+        1.0,
+        args=(q, m, sigma, delta, a),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma, "a": a}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_Huber,
+        border_minus_Huber,
+        test_fun_upper_Huber,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_Huber_single_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta, a),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_L2_double_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL2(r, 0.0, sigma),
+            lambda r: DfoutL2(r, 0.0, sigma),
+            [],
+            _channel_mixture_double_noise(m, q, delta_small, delta_large, eps),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L2_double_noise,
+        np.sqrt((1 + max(delta_small, delta_large))),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
+    )
+
+    domain_xi, domain_y = divide_integration_borders_grid(borders)
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L2_double_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_L1_double_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL1(r, 0.0, sigma),
+            lambda r: DfoutL1(r, 0.0, sigma),
+            [-sigma, sigma],
+            _channel_mixture_double_noise(m, q, delta_small, delta_large, eps),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L1_double_noise,
+        np.sqrt((1 + max(delta_small, delta_large))),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_L1,
+        border_minus_L1,
+        test_fun_upper_L1,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L1_double_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_Huber_double_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    a,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutHuber(r, 0.0, sigma, a),
+            lambda r: DfoutHuber(r, 0.0, sigma, a),
+            [-a * (1 + sigma), a * (1 + sigma)],
+            _channel_mixture_double_noise(m, q, delta_small, delta_large, eps),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_Huber_double_noise,
+        np.sqrt((1 + max(delta_small, delta_large))),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, a),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma, "a": a}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_Huber,
+        border_minus_Huber,
+        test_fun_upper_Huber,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_Huber_double_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps, a),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_L2_decorrelated_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    beta,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL2(r, 0.0, sigma),
+            lambda r: DfoutL2(r, 0.0, sigma),
+            [],
+            _channel_mixture_decorrelated_noise(
+                m, q, delta_small, delta_large, eps, beta
+            ),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L2_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
+    )
+
+    domain_xi, domain_y = divide_integration_borders_grid(borders)
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L2_decorrelated_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps, beta),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_L1_decorrelated_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    beta,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutL1(r, 0.0, sigma),
+            lambda r: DfoutL1(r, 0.0, sigma),
+            [-sigma, sigma],
+            _channel_mixture_decorrelated_noise(
+                m, q, delta_small, delta_large, eps, beta
+            ),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_L1_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_L1,
+        border_minus_L1,
+        test_fun_upper_L1,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_L1_decorrelated_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps, beta),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+def hat_equations_Huber_decorrelated_noise(
+    m,
+    q,
+    sigma,
+    delta_small,
+    delta_large,
+    eps,
+    beta,
+    a,
+    integration_backend="dblquad",
+    semi_analytic=False,
+):
+    if semi_analytic:
+        return semi_analytic_hat_equations(
+            lambda r: foutHuber(r, 0.0, sigma, a),
+            lambda r: DfoutHuber(r, 0.0, sigma, a),
+            [-a * (1 + sigma), a * (1 + sigma)],
+            _channel_mixture_decorrelated_noise(
+                m, q, delta_small, delta_large, eps, beta
+            ),
+            integration_backend=integration_backend,
+        )
+
+    borders = integration_borders(
+        hat_integrals_Huber_decorrelated_noise,
+        np.sqrt(max(1 + delta_small, beta ** 2 + delta_large)),
+        1.0,
+        args=(q, m, sigma, delta_small, delta_large, eps, beta, a),
+    )
+
+    args = {"m": m, "q": q, "sigma": sigma, "a": a}
+    domain_xi, domain_y = domains_double_line_constraint(
+        borders,
+        border_plus_Huber,
+        border_minus_Huber,
+        test_fun_upper_Huber,
+        args,
+        args,
+        args,
+    )
+
+    integral_values = np.zeros(3)
+    for xi_funs, y_funs in zip(domain_xi, domain_y):
+        integral_values += dblquad_backend(integration_backend, vector=True)(
+            hat_integrals_Huber_decorrelated_noise,
+            xi_funs[0],
+            xi_funs[1],
+            y_funs[0],
+            y_funs[1],
+            args=(q, m, sigma, delta_small, delta_large, eps, beta, a),
+            epsabs=EPSABS,
+            epsrel=EPSREL,
+        )[0]
+
+    m_int, q_int, sigma_int = integral_values
+    return m_int, q_int, sigma_int
+
+
+# ------------------
+# Semi-analytic hat equations
+# ------------------
+
+# fout of L2, L1 and Huber depends on y and xi only through r = y - sqrt(q) xi.
+# In the variables (r, xi) every gaussian component of Zout is gaussian in xi
+# too, so the xi integral is done analytically and a 1-D integral over r is
+# left, with a gaussian mixture in r as weight.
+
+
+def _channel_mixture_single_noise(m, q, delta):
+    # weights, slopes of omega in the mean and variances of the components
+    eta = m ** 2 / q
+    return (
+        np.array([1.0]),
+        np.array([1.0]),
+        np.array([1 - eta + delta + (np.sqrt(q) - np.sqrt(eta)) ** 2]),
+    )
+
+
+def _channel_mixture_double_noise(m, q, delta_small, delta_large, eps):
+    eta = m ** 2 / q
+    return (
+        np.array([1 - eps, eps]),
+        np.array([1.0, 1.0]),
+        np.array([1 - eta + delta_small, 1 - eta + delta_large])
+        + (np.sqrt(q) - np.sqrt(eta)) ** 2,
+    )
+
+
+def _channel_mixture_decorrelated_noise(m, q, delta_small, delta_large, eps, beta):
+    eta = m ** 2 / q
+    return (
+        np.array([1 - eps, eps]),
+        np.array([1.0, beta]),
+        np.array(
+            [
+                1 - eta + delta_small + (np.sqrt(q) - np.sqrt(eta)) ** 2,
+                beta ** 2 * (1 - eta)
+                + delta_large
+                + (np.sqrt(q) - beta * np.sqrt(eta)) ** 2,
+            ]
+        ),
+    )
+
+
+def _semi_analytic_integrands(r, fout, dfout, weights, slopes, variances):
+    densities = (
+        weights
+        * np.exp(-(np.asarray(r)[..., None] ** 2) / (2 * variances))
+        / np.sqrt(2 * np.pi * variances)
+    )
+    density = np.sum(densities, axis=-1)
+    fout_values = fout(r)
+    return (
+        fout_values * r * np.sum(slopes * densities / variances, axis=-1),
+        fout_values ** 2 * density,
+        dfout(r) * density,
+    )
+
+
+def _semi_analytic_breakpoints(kinks, variances):
+    edges = np.outer(np.sqrt(variances), SEMI_ANALYTIC_PANEL_EDGES).ravel()
+    return np.unique(np.concatenate([kinks, edges, -edges, [0.0]]))
+
+
+def semi_analytic_hat_equations(
+    fout, dfout, kinks, channel_mixture, integration_backend="dblquad"
+):
+    weights, slopes, variances = channel_mixture
+    m_int, q_int, sigma_int = quad_backend(integration_backend)(
+        _semi_analytic_integrands,
+        _semi_analytic_breakpoints(kinks, variances),
+        args=(fout, dfout, weights, slopes, variances),
+        epsabs=EPSABS,
+        epsrel=EPSREL,
+    )[0]
+    return m_int, q_int, sigma_int
@@ -5,6 +5,7 @@ from sklearn.utils import axis0_safe_slice
 from sklearn.utils.extmath import safe_sparse_dot
 from numba import njit
 import cvxpy as cp
+from src.loss_functions import LOSSES
 
 from multiprocessing import Pool
 
@@ -410,3 +411,54 @@ def find_coefficients_cutted_l2(ys, xs, reg_param, a=1.0, max_iter=150, tol=1e-3
         )
 
     return opt_res.x
+
+
+@njit(error_model="numpy", fastmath=True)
+def _loss_and_gradient_registered(w, xs_norm, ys, reg_param, loss, Dloss, loss_params):
+    zs = xs_norm @ w
+    residual_derivatives = np.empty_like(ys)
+
+    total_loss = 0.5 * reg_param * np.dot(w, w)
+    for idx in range(len(ys)):
+        total_loss += loss(ys[idx], zs[idx], *loss_params)
+        residual_derivatives[idx] = Dloss(ys[idx], zs[idx], *loss_params)
+
+    gradient = reg_param * w - xs_norm.T @ residual_derivatives
+
+    return total_loss, gradient
+
+
+def find_coefficients_registered_loss(
+    ys, xs, reg_param, loss_name="double_quad", max_iter=15000, tol=1e-6, **loss_args
+):
+    # ERM with any loss of loss_functions.LOSSES, loss_args are the parameters
+    # of the loss by name. The loss can be non convex, so the descent starts
+    # from the ridge estimator and not from a random point.
+    _, d = xs.shape
+    loss = LOSSES[loss_name]
+    w = find_coefficients_L2(ys, xs, reg_param)
+    xs_norm = np.divide(xs, np.sqrt(d))
+
+    opt_res = optimize.minimize(
+        _loss_and_gradient_registered,
+        w,
+        method="L-BFGS-B",
+        jac=True,
+        args=(
+            xs_norm,
+            ys,
+            reg_param,
+            loss["loss"],
+            loss["Dloss"],
+            tuple(float(loss_args[name]) for name in loss["params"]),
+        ),
+        options={"maxiter": max_iter, "gtol": tol, "iprint": -1},
+    )
+
+    if opt_res.status == 2:
+        raise ValueError(
+            "%s regressor convergence failed: l-BFGS-b solver terminated with %s"
+            % (loss_name, opt_res.message)
+        )
+
+    return opt_res.x
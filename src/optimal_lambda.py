@@ -1,6 +1,11 @@
 import numpy as np
 from scipy.optimize import minimize, Bounds
 import src.fpeqs as fp
+from src.fpeqs_L2 import var_func_L2
+from src.fpeqs_Huber import (
+    var_hat_func_Huber_num_single_noise,
+    var_hat_func_Huber_num_double_noise,
+)
 from multiprocessing import Pool
 
 # from mpi4py.futures import MPIPoolExecutor as Pool
@@ -12,18 +17,38 @@ XATOL = 1e-8
 FATOL = 1e-8
 
 
+def _sum_telemetry(infos):
+    # totals over all the solves done for one optimisation
+    telemetry = fp.collect_telemetry(infos)
+    summed = {key: np.sum(telemetry[key]) for key in fp.TELEMETRY_FIELDS}
+    summed["n_solves"] = len(infos)
+    summed["n_not_converged"] = np.sum(telemetry["status"] != "converged")
+    return summed
+
+
 def _find_optimal_reg_param_gen_error(
-    alpha, var_func, var_hat_func, initial_cond, var_hat_kwargs, inital_value
+    alpha,
+    var_func,
+    var_hat_func,
+    initial_cond,
+    var_hat_kwargs,
+    inital_value,
+    full_output=False,
 ):
-    def minimize_fun(reg_param):
-        m, q, _ = fp.state_equations(
+    infos = []
+
+    def minimize_fun(x):
+        # Nelder-Mead passes a length-1 array, the channels need a float
+        (m, q, _), info = fp.state_equations(
             var_func,
             var_hat_func,
-            reg_param=reg_param,
+            reg_param=float(x[0]),
             alpha=alpha,
             init=initial_cond,
             var_hat_kwargs=var_hat_kwargs,
+            full_output=True,
         )
+        infos.append(info)
         return 1 + q - 2 * m
 
     bnds = [(SMALLEST_REG_PARAM, None)]
@@ -36,7 +61,9 @@ def _find_optimal_reg_param_gen_error(
     )  # , , "maxiter":MAX_ITER
     if obj.success:
         fun_val = obj.fun
-        reg_param_opt = obj.x
+        reg_param_opt = obj.x[0]
+        if full_output:
+            return fun_val, reg_param_opt, _sum_telemetry(infos)
         return fun_val, reg_param_opt
     else:
         raise RuntimeError("Minima could not be found.")
@@ -50,6 +77,7 @@ def optimal_lambda(
     n_alpha_points=16,
     initial_cond=[0.6, 0.0, 0.0],
     var_hat_kwargs={},
+    full_output=False,
 ):
     alphas = np.logspace(
         np.log(alpha_1) / np.log(10), np.log(alpha_2) / np.log(10), n_alpha_points
@@ -61,30 +89,82 @@ def optimal_lambda(
     # init_param = []
 
     inputs = [
-        (a, var_func, var_hat_func, initial_cond, var_hat_kwargs, init_param)
+        (a, var_func, var_hat_func, initial_cond, var_hat_kwargs, init_param, True)
         for a in alphas
     ]
 
     with Pool() as pool:
         results = pool.starmap(_find_optimal_reg_param_gen_error, inputs)
 
-    for idx, (e, regp) in enumerate(results):
+    for idx, (e, regp, _) in enumerate(results):
         fun_values[idx] = e
         reg_param_opt[idx] = regp
 
+    if full_output:
+        telemetry = {
+            key: np.array([res[2][key] for res in results])
+            for key in results[0][2].keys()
+        }
+        return alphas, fun_values, reg_param_opt, telemetry
     return alphas, fun_values, reg_param_opt
 
 
+def adaptive_optimal_lambda(
+    var_func,
+    var_hat_func,
+    alpha_1=0.01,
+    alpha_2=100,
+    n_alpha_points=fp.ADAPTIVE_INITIAL_POINTS,
+    initial_cond=[0.6, 0.0, 0.0],
+    var_hat_kwargs={},
+    tol=fp.ADAPTIVE_TOL,
+    max_alpha_points=fp.ADAPTIVE_MAX_POINTS,
+):
+    # the grid is refined on both the error and the optimal reg_param, so that
+    # jumps of the latter get bisected, the midpoints start the minimisation
+    # from the optimal reg_param of their left neighbour
+    init_param = 0.1 * np.random.random() + 0.1
+
+    def evaluate(alphas, seeds):
+        inputs = [
+            (
+                a,
+                var_func,
+                var_hat_func,
+                initial_cond,
+                var_hat_kwargs,
+                init_param if seed is None else seed,
+            )
+            for a, seed in zip(alphas, seeds)
+        ]
+
+        with Pool() as pool:
+            results = pool.starmap(_find_optimal_reg_param_gen_error, inputs)
+
+        return results, [regp for _, regp in results]
+
+    alphas, values = fp.adaptive_log_grid(
+        evaluate,
+        alpha_1,
+        alpha_2,
+        n_points=n_alpha_points,
+        tol=tol,
+        max_points=max_alpha_points,
+    )
+
+    return alphas, values[:, 0], values[:, 1]
+
+
 def _find_optimal_huber_parameter_gen_error(
     alpha, double_noise, reg_param, initial, var_hat_kwargs, inital_value
 ):
-    def error_func(a):
-        var_hat_kwargs.update({"a": a})
+    def error_func(x):
+        var_hat_kwargs.update({"a": float(x[0])})
         m, q, _ = fp.state_equations(
-            fp.var_func_L2,
-            fp.var_hat_func_Huber_num_double_noise
+            var_func_L2,
+            var_hat_func_Huber_num_double_noise
             if double_noise
-            else fp.var_hat_func_Huber_num_single_noise,
+            else var_hat_func_Huber_num_single_noise,
             reg_param=reg_param,
             alpha=alpha,
             init=initial,
@@ -102,7 +182,7 @@ def _find_optimal_huber_parameter_gen_error(
     )  # ,
     if obj.success:
         fun_val = obj.fun
-        a_opt = obj.x
+        a_opt = obj.x[0]
         return fun_val, a_opt
     else:
         raise RuntimeError("Minima could not be found.")
@@ -146,7 +226,7 @@ def _find_optimal_reg_param_and_huber_parameter_gen_error(
         reg_param, a = x
         var_hat_kwargs.update({"a": a})
         m, q, _ = fp.state_equations(
-            fp.var_func_L2,
+            var_func_L2,
             var_hat_func,
             reg_param=reg_param,
             alpha=alpha,
@@ -172,7 +252,7 @@ def _find_optimal_reg_param_and_huber_parameter_gen_error(
 
 
 def optimal_reg_param_and_huber_parameter(
-    var_hat_func=fp.var_hat_func_Huber_num_double_noise,
+    var_hat_func=var_hat_func_Huber_num_double_noise,
     alpha_1=0.01,
     alpha_2=100,
     n_alpha_points=16,
@@ -210,7 +290,7 @@ def optimal_reg_param_and_huber_parameter(
 
 
 def no_parallel_optimal_reg_param_and_huber_parameter(
-    var_hat_func=fp.var_hat_func_Huber_num_double_noise,
+    var_hat_func=var_hat_func_Huber_num_double_noise,
     alpha_1=0.01,
     alpha_2=100,
     n_alpha_points=16,
@@ -11,8 +11,8 @@ from src.optimal_lambda import (
 from src.fpeqs_BO import (
     var_func_BO,
     var_hat_func_BO_single_noise,
-    var_hat_func_BO_num_double_noise,
-    var_hat_func_BO_num_decorrelated_noise,
+    var_hat_func_BO_double_noise,
+    var_hat_func_BO_decorrelated_noise,
 )
 from src.fpeqs_L2 import (
     var_func_L2,
@@ -207,6 +207,11 @@ def save_file(**kwargs):
     else:
         raise ValueError("experiment_type not recognized.")
 
+    if kwargs.get("telemetry") is not None:
+        if file_path.endswith(".npz"):
+            file_path = file_path[: -len(".npz")]
+        np.savez(file_path + "_telemetry", **kwargs["telemetry"])
+
 
 def load_file(**kwargs):
     file_path = kwargs.get("file_path")
@@ -427,16 +432,46 @@ def theory_curve_runner(**kwargs):
     if _loss_type_chose(kwargs["loss_name"], values=[False, False, True, False]):
         var_hat_kwargs.update({"a": kwargs["a"]})
 
-    alphas, [errors] = fpe.no_parallel_different_alpha_observables_fpeqs(
-        var_func_L2,
-        _loss_type_chose(kwargs["loss_name"], values=var_functions),
-        alpha_1=kwargs["alpha_min"],
-        alpha_2=kwargs["alpha_max"],
-        n_alpha_points=kwargs["alpha_pts"],
-        reg_param=kwargs["reg_param"],
-        initial_cond=initial_condition,
-        var_hat_kwargs=var_hat_kwargs,
-    )
+    if kwargs.get("n_starts") is not None:
+        # the error is the one of the fixed point with the largest basin
+        alphas, multi_start_results = fpe.multi_start_different_alpha_fpeqs(
+            var_func_L2,
+            _loss_type_chose(kwargs["loss_name"], values=var_functions),
+            alpha_1=kwargs["alpha_min"],
+            alpha_2=kwargs["alpha_max"],
+            n_alpha_points=kwargs["alpha_pts"],
+            reg_param=kwargs["reg_param"],
+            var_hat_kwargs=var_hat_kwargs,
+            n_starts=kwargs["n_starts"],
+            parallel=kwargs.get("parallel", False),
+        )
+        errors = np.full(len(alphas), np.nan)
+        for idx, (fixed_points, counts) in enumerate(multi_start_results):
+            if len(counts) > 0:
+                m, q, _ = fixed_points[0]
+                errors[idx] = 1 + q - 2 * m
+            if len(counts) != 1:
+                print(
+                    "alpha {:.3e} : {} fixed points, basins {}".format(
+                        alphas[idx], len(counts), counts
+                    )
+                )
+    else:
+        sweep_out = fpe.no_parallel_different_alpha_observables_fpeqs(
+            var_func_L2,
+            _loss_type_chose(kwargs["loss_name"], values=var_functions),
+            alpha_1=kwargs["alpha_min"],
+            alpha_2=kwargs["alpha_max"],
+            n_alpha_points=kwargs["alpha_pts"],
+            reg_param=kwargs["reg_param"],
+            initial_cond=initial_condition,
+            var_hat_kwargs=var_hat_kwargs,
+            continuation=kwargs.get("continuation"),
+            full_output=kwargs.get("save_telemetry", False),
+        )
+        alphas, [errors] = sweep_out[:2]
+        if kwargs.get("save_telemetry", False):
+            kwargs.update({"telemetry": sweep_out[2]})
 
     kwargs.update(
         {"file_path": file_path, "alphas": alphas, "errors": errors,}
@@ -470,7 +505,7 @@ def bayes_optimal_runner(**kwargs):
                 initial_condition = [m, q, sigma]
                 break
 
-        var_function = var_hat_func_BO_num_decorrelated_noise
+        var_function = var_hat_func_BO_decorrelated_noise
     else:
         if double_noise:
             var_hat_kwargs = {
@@ -494,7 +529,7 @@ def bayes_optimal_runner(**kwargs):
                     break
             print("double noise")
             print(var_hat_kwargs)
-            var_function = var_hat_func_BO_num_double_noise
+            var_function = var_hat_func_BO_double_noise
         else:
             var_hat_kwargs = {"delta": kwargs["delta"]}
 
@@ -510,7 +545,7 @@ def bayes_optimal_runner(**kwargs):
 
             var_function = var_hat_func_BO_single_noise
 
-    alphas, (errors,) = fpe.different_alpha_observables_fpeqs(
+    sweep_out = fpe.different_alpha_observables_fpeqs(
         var_func_BO,
         var_function,
         alpha_1=kwargs["alpha_min"],
@@ -518,7 +553,12 @@ def bayes_optimal_runner(**kwargs):
         n_alpha_points=kwargs["alpha_pts"],
         initial_cond=initial_condition,
         var_hat_kwargs=var_hat_kwargs,
+        continuation=kwargs.get("continuation"),
+        full_output=kwargs.get("save_telemetry", False),
     )
+    alphas, (errors,) = sweep_out[:2]
+    if kwargs.get("save_telemetry", False):
+        kwargs.update({"telemetry": sweep_out[2]})
 
     kwargs.update(
         {"file_path": file_path, "alphas": alphas, "errors": errors,}
@@ -608,7 +648,7 @@ def reg_param_optimal_runner(**kwargs):
     if _loss_type_chose(kwargs["loss_name"], values=[False, False, True, False]):
         var_hat_kwargs.update({"a": kwargs["a"]})
 
-    alphas, errors, lambdas = optimal_lambda(
+    optimal_out = optimal_lambda(
         var_func_L2,
         _loss_type_chose(kwargs["loss_name"], values=var_functions),
         alpha_1=kwargs["alpha_min"],
@@ -616,7 +656,11 @@ def reg_param_optimal_runner(**kwargs):
         n_alpha_points=kwargs["alpha_pts"],
         initial_cond=initial_condition,
         var_hat_kwargs=var_hat_kwargs,
+        full_output=kwargs.get("save_telemetry", False),
     )
+    alphas, errors, lambdas = optimal_out[:3]
+    if kwargs.get("save_telemetry", False):
+        kwargs.update({"telemetry": optimal_out[3]})
 
     kwargs.update(
         {"file_path": file_path, "alphas": alphas, "errors": errors, "lambdas": lambdas,}
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from numba import njit
+import src.fpeqs as fp
+from src.branch_tracing import trace_branches
+from src.fpeqs_L2 import var_func_L2
+from src.fpeqs_Huber import var_hat_func_Huber_double_noise
+
+# run with python -m pytest test_branch_tracing.py
+
+HUBER_DOUBLE_NOISE = {
+    "delta_small": 0.1,
+    "delta_large": 5.0,
+    "percentage": 0.3,
+    "a": 1.0,
+}
+
+
+@njit
+def var_func_identity(m_hat, q_hat, sigma_hat, reg_param):
+    return m_hat, q_hat, sigma_hat
+
+
+@njit
+def var_hat_func_S_curve(m, q, sigma, alpha):
+    # the fixed points are on log(alpha) = (m^3 - 3 m) / 2 with q = sigma = 1,
+    # an S-shaped curve with folds at alpha = e (m = -1) and alpha = 1 / e
+    # (m = 1) and an unstable middle branch
+    return m + 0.2 * (np.log(alpha) - (m ** 3 - 3 * m) / 2), 1.0, 1.0
+
+
+def test_trace_branches_finds_the_folds():
+    trace = trace_branches(
+        var_func_identity,
+        var_hat_func_S_curve,
+        alpha_1=np.exp(-3),
+        alpha_2=np.exp(3),
+        initial_cond=[-2.0, 1.0, 1.0],
+    )
+    np.testing.assert_allclose(trace["folds"], [np.e, 1 / np.e], rtol=5e-2)
+    assert [np.all(branch["stable"][1:-1]) for branch in trace["branches"]] == [
+        True,
+        False,
+        True,
+    ]
+    assert not np.any(trace["branches"][1]["stable"][1:-1])
+    np.testing.assert_allclose(
+        np.log(trace["alphas"]), (trace["m"] ** 3 - 3 * trace["m"]) / 2, atol=1e-8
+    )
+    np.testing.assert_allclose(trace["q"], 1.0)
+
+
+def test_trace_branches_stays_in_the_alpha_range():
+    alpha_1, alpha_2 = 0.1, 100.0
+    trace = trace_branches(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        alpha_1=alpha_1,
+        alpha_2=alpha_2,
+        initial_cond=[0.5, 0.5, 0.5],
+        var_hat_kwargs=HUBER_DOUBLE_NOISE,
+    )
+    log_alphas = np.log(trace["alphas"])
+    assert np.all(np.diff(log_alphas) > 0)
+    assert log_alphas[0] == np.log(alpha_1) and log_alphas[-1] == np.log(alpha_2)
+    assert len(trace["folds"]) == 0 and np.all(trace["stable"])
+    for idx in [len(trace["alphas"]) // 2, -1]:
+        np.testing.assert_allclose(
+            (trace["m"][idx], trace["q"][idx], trace["sigma"][idx]),
+            fp.state_equations(
+                var_func_L2,
+                var_hat_func_Huber_double_noise,
+                0.1,
+                trace["alphas"][idx],
+                [0.5, 0.5, 0.5],
+                HUBER_DOUBLE_NOISE,
+            ),
+            atol=1e-7,
+        )
+
+
+def test_trace_branches_needs_a_converged_start():
+    with pytest.raises(ValueError):
+        trace_branches(
+            var_func_L2,
+            var_hat_func_Huber_double_noise,
+            initial_cond=[0.5, np.nan, 0.5],
+            var_hat_kwargs=HUBER_DOUBLE_NOISE,
+        )
@@ -0,0 +1,414 @@
+import subprocess
+import sys
+import numpy as np
+import pytest
+from numba import njit
+import src.fpeqs as fp
+import src.fpeqs_L2 as fpeqs_L2
+from src.fpeqs_L2 import var_func_L2, var_hat_func_L2_num_single_noise
+from src.fpeqs_Huber import var_hat_func_Huber_double_noise
+from src.fpeqs_BO import var_func_BO, var_hat_func_BO_single_noise
+
+# run with python -m pytest test_fpeqs.py
+
+REG_PARAM = 0.1
+INIT = [0.5, 0.5, 0.5]
+HUBER_DOUBLE_NOISE = {
+    "delta_small": 0.1,
+    "delta_large": 5.0,
+    "percentage": 0.3,
+    "a": 1.0,
+}
+L2_NOISES = {
+    "single_noise": {"delta": 1.0},
+    "double_noise": {"delta_small": 0.5, "delta_large": 5.0, "percentage": 0.1},
+    "decorrelated_noise": {
+        "delta_small": 0.5,
+        "delta_large": 5.0,
+        "percentage": 0.1,
+        "beta": 0.3,
+    },
+}
+TOL_SOLVERS = 1e-7
+TOL_DIRECT = 1e-8
+
+
+@njit
+def var_func_identity(m_hat, q_hat, sigma_hat, reg_param):
+    return m_hat, q_hat, sigma_hat
+
+
+@njit
+def var_hat_func_double_well(m, q, sigma, alpha):
+    # two stable fixed points m = +-sqrt(3) (and m = 0 unstable) at alpha = 1,
+    # with q = sigma = 1
+    return m + 0.2 * (np.log(alpha) - (m**3 - 3 * m) / 2), 1.0, 1.0
+
+
+@pytest.mark.parametrize("alpha", [0.5, 2.0, 20.0])
+def test_anderson_matches_damped(alpha):
+    args = (
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        REG_PARAM,
+        alpha,
+        INIT,
+        HUBER_DOUBLE_NOISE,
+    )
+    np.testing.assert_allclose(
+        fp.state_equations(*args, method="anderson"),
+        fp.state_equations(*args),
+        atol=TOL_SOLVERS,
+    )
+    n_damped, n_anderson, n_saved = fp.anderson_saved_evaluations(*args)
+    assert n_saved == n_damped - n_anderson > 0
+
+
+@pytest.mark.parametrize("alpha", [0.5, 2.0, 20.0, 1e4])
+def test_broyden_matches_damped(alpha):
+    args = (
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        REG_PARAM,
+        alpha,
+        INIT,
+        HUBER_DOUBLE_NOISE,
+    )
+    np.testing.assert_allclose(
+        fp.state_equations(*args, method="broyden"),
+        fp.state_equations(*args),
+        atol=TOL_SOLVERS,
+    )
+
+
+def test_jit_state_equations_matches_python_loop():
+    alphas = [0.5, 2.0, 20.0]
+    var_hat_args = fp.var_hat_args_from_kwargs(
+        var_hat_func_Huber_double_noise, HUBER_DOUBLE_NOISE
+    )
+    python_loop = [
+        fp.state_equations(
+            var_func_L2,
+            var_hat_func_Huber_double_noise,
+            REG_PARAM,
+            alpha,
+            INIT,
+            HUBER_DOUBLE_NOISE,
+            adaptive_blend=False,
+        )
+        for alpha in alphas
+    ]
+    for alpha, fixed_point in zip(alphas, python_loop):
+        np.testing.assert_allclose(
+            fp.jit_state_equations(
+                var_func_L2,
+                var_hat_func_Huber_double_noise,
+                REG_PARAM,
+                alpha,
+                INIT,
+                var_hat_args,
+            ),
+            fixed_point,
+            rtol=1e-12,
+        )
+
+    _, (ms,) = fp.jit_different_alpha_observables_fpeqs(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        funs=[lambda m, q, sigma: m],
+        alpha_1=alphas[0],
+        alpha_2=alphas[-1],
+        n_alpha_points=2,
+        reg_param=REG_PARAM,
+        initial_cond=INIT,
+        var_hat_kwargs=HUBER_DOUBLE_NOISE,
+    )
+    np.testing.assert_allclose(ms, [python_loop[0][0], python_loop[-1][0]], rtol=1e-12)
+
+
+def test_batch_state_equations_matches_single_solves():
+    # every point is frozen at its own convergence, so the batch gives the
+    # point-by-point solves exactly
+    alphas = np.array([[0.5], [2.0], [20.0]])
+    reg_params = np.array([0.01, 0.1, 1.0])
+    ms, qs, sigmas = fp.batch_state_equations(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        reg_params,
+        alphas,
+        INIT,
+        HUBER_DOUBLE_NOISE,
+    )
+    assert ms.shape == (3, 3)
+    var_hat_args = fp.var_hat_args_from_kwargs(
+        var_hat_func_Huber_double_noise, HUBER_DOUBLE_NOISE
+    )
+    for idx, jdx in np.ndindex(ms.shape):
+        np.testing.assert_array_equal(
+            (ms[idx, jdx], qs[idx, jdx], sigmas[idx, jdx]),
+            fp.jit_state_equations(
+                var_func_L2,
+                var_hat_func_Huber_double_noise,
+                reg_params[jdx],
+                alphas[idx, 0],
+                INIT,
+                var_hat_args,
+            ),
+        )
+
+
+@pytest.mark.parametrize("continuation", ["forward", "backward"])
+def test_continuation_matches_cold_starts(continuation):
+    n_evaluations = [0]
+
+    def counted_var_hat_func(m, q, sigma, alpha, **kwargs):
+        n_evaluations[0] += 1
+        return var_hat_func_Huber_double_noise(m, q, sigma, alpha, **kwargs)
+
+    sweep_kwargs = {
+        "funs": [lambda m, q, sigma: m, lambda m, q, sigma: q],
+        "alpha_1": 0.1,
+        "alpha_2": 1000,
+        "n_alpha_points": 12,
+        "reg_param": REG_PARAM,
+        "initial_cond": INIT,
+        "var_hat_kwargs": HUBER_DOUBLE_NOISE,
+    }
+    alphas, cold = fp.no_parallel_different_alpha_observables_fpeqs(
+        var_func_L2, counted_var_hat_func, **sweep_kwargs
+    )
+    n_cold, n_evaluations[0] = n_evaluations[0], 0
+
+    continued_alphas, continued = fp.no_parallel_different_alpha_observables_fpeqs(
+        var_func_L2, counted_var_hat_func, continuation=continuation, **sweep_kwargs
+    )
+    np.testing.assert_array_equal(continued_alphas, alphas)
+    np.testing.assert_allclose(continued, cold, atol=TOL_SOLVERS)
+    assert n_evaluations[0] < n_cold
+
+
+@pytest.mark.parametrize("method", fp.SOLVER_METHODS)
+def test_guarded_solver_statuses(method):
+    args = (
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        REG_PARAM,
+        2.0,
+        INIT,
+        HUBER_DOUBLE_NOISE,
+    )
+    _, info = fp.state_equations(*args, method=method, full_output=True)
+    assert info["status"] == "converged"
+    _, info = fp.state_equations(*args, method=method, max_iter=3, full_output=True)
+    assert info["status"] == "stalled"
+
+    def nan_var_hat_func(m, q, sigma, alpha, **kwargs):
+        return np.nan, np.nan, np.nan
+
+    _, info = fp.state_equations(
+        var_func_L2,
+        nan_var_hat_func,
+        REG_PARAM,
+        2.0,
+        INIT,
+        HUBER_DOUBLE_NOISE,
+        method=method,
+        full_output=True,
+    )
+    assert info["status"] == "diverged"
+
+
+def test_jit_solver_statuses():
+    var_hat_args = fp.var_hat_args_from_kwargs(
+        var_hat_func_Huber_double_noise, HUBER_DOUBLE_NOISE
+    )
+    statuses = [
+        fp.jit_state_equations(
+            var_func_L2,
+            var_hat_func_Huber_double_noise,
+            REG_PARAM,
+            2.0,
+            init,
+            var_hat_args,
+            max_iter=max_iter,
+            full_output=True,
+        )[1]["status"]
+        for init, max_iter in [
+            (INIT, fp.MAX_ITER_FPE),
+            (INIT, 3),
+            ([0.5, np.nan, 0.5], fp.MAX_ITER_FPE),
+        ]
+    ]
+    assert statuses == fp.SOLVER_STATUSES
+
+    _, _, _, converged = fp.batch_state_equations(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        REG_PARAM,
+        [2.0, 2.0],
+        [[0.5, 0.5], [0.5, np.nan], [0.5, 0.5]],
+        HUBER_DOUBLE_NOISE,
+        full_output=True,
+    )
+    np.testing.assert_array_equal(converged, [True, False])
+
+
+def test_telemetry_of_a_numerical_channel():
+    _, info = fp.state_equations(
+        var_func_L2,
+        var_hat_func_L2_num_single_noise,
+        REG_PARAM,
+        2.0,
+        INIT,
+        {"delta": 1.0},
+        full_output=True,
+    )
+    assert info["status"] == "converged"
+    assert info["n_iter"] == info["n_evaluations"] == len(info["residuals"])
+    assert info["residuals"][-1] <= fp.TOL_FPE
+    assert info["time_var_hat_func"] > info["time_var_func"] > 0
+    assert info["n_integrand_evals"] > 3 * info["n_evaluations"]
+
+
+def test_sweep_telemetry():
+    _, _, telemetry = fp.no_parallel_different_alpha_observables_fpeqs(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        alpha_1=0.5,
+        alpha_2=20.0,
+        n_alpha_points=3,
+        reg_param=REG_PARAM,
+        initial_cond=INIT,
+        var_hat_kwargs=HUBER_DOUBLE_NOISE,
+        full_output=True,
+    )
+    assert set(telemetry) >= set(fp.TELEMETRY_FIELDS) | {"status", "residuals"}
+    np.testing.assert_array_equal(telemetry["status"], ["converged"] * 3)
+    assert telemetry["residuals"].shape == (3, np.max(telemetry["n_iter"]))
+    np.testing.assert_array_equal(telemetry["n_integrand_evals"], 0)
+
+
+def test_adaptive_log_grid_refines_the_step():
+    def evaluate(params, seeds):
+        return np.tanh(4 * (np.log(params) - 1)), seeds
+
+    params, values = fp.adaptive_log_grid(evaluate, 1e-2, 1e2, tol=1e-3)
+    log_params = np.log(params)
+    assert np.all(np.diff(log_params) > 0)
+    np.testing.assert_array_equal(values[:, 0], np.tanh(4 * (log_params - 1)))
+    # most points on the step, and a much better curve than a uniform grid
+    assert np.sum(np.abs(log_params - 1) < 1) > len(params) / 2
+    fine = np.linspace(log_params[0], log_params[-1], 10001)
+    uniform = np.linspace(log_params[0], log_params[-1], len(params))
+    adaptive_error = np.max(
+        np.abs(np.interp(fine, log_params, values[:, 0]) - np.tanh(4 * (fine - 1)))
+    )
+    uniform_error = np.max(
+        np.abs(
+            np.interp(fine, uniform, np.tanh(4 * (uniform - 1)))
+            - np.tanh(4 * (fine - 1))
+        )
+    )
+    assert adaptive_error < uniform_error / 10
+
+
+def test_adaptive_sweep_points_are_fixed_points():
+    alphas, (ms,) = fp.adaptive_different_alpha_observables_fpeqs(
+        var_func_L2,
+        var_hat_func_Huber_double_noise,
+        funs=[lambda m, q, sigma: m],
+        alpha_1=0.1,
+        alpha_2=100.0,
+        reg_param=REG_PARAM,
+        initial_cond=INIT,
+        var_hat_kwargs=HUBER_DOUBLE_NOISE,
+        max_alpha_points=15,
+    )
+    assert len(alphas) == 15 and np.all(np.diff(alphas) > 0)
+    for alpha, m in zip(alphas[::4], ms[::4]):
+        assert m == pytest.approx(
+            fp.state_equations(
+                var_func_L2,
+                var_hat_func_Huber_double_noise,
+                REG_PARAM,
+                alpha,
+                INIT,
+                HUBER_DOUBLE_NOISE,
+            )[0],
+            abs=TOL_SOLVERS,
+        )
+
+
+@pytest.mark.parametrize("solver_kwargs", [{}, {"method": "anderson"}])
+def test_multi_start_finds_both_wells(solver_kwargs):
+    initial_conds = [[-2.0, 1.0, 1.0], [-1.2, 0.5, 2.0], [1.2, 2.0, 0.5]]
+    initial_conds += [[1.5, 1.0, 1.0], [2.0, 1.0, 1.0], [2.5, 0.5, 0.5]]
+    fixed_points, counts = fp.multi_start_state_equations(
+        var_func_identity,
+        var_hat_func_double_well,
+        REG_PARAM,
+        1.0,
+        {},
+        initial_conds=initial_conds,
+        solver_kwargs=solver_kwargs,
+    )
+    np.testing.assert_array_equal(counts, [4, 2])
+    np.testing.assert_allclose(
+        fixed_points, [[np.sqrt(3), 1.0, 1.0], [-np.sqrt(3), 1.0, 1.0]], atol=1e-8
+    )
+
+
+def test_cluster_fixed_points():
+    points = np.array([[1.0, 2.0, 3.0], [0.5, 0.5, 0.5], [1.0, 2.0, 3.0 + 1e-7]])
+    centers, counts = fp.cluster_fixed_points(points, cluster_tol=1e-6)
+    np.testing.assert_array_equal(centers, points[[0, 1]])
+    np.testing.assert_array_equal(counts, [2, 1])
+    assert len(fp.cluster_fixed_points(points, cluster_tol=1e-8)[1]) == 3
+
+
+def test_parallel_multi_start_then_pool_exits():
+    # the numba threads of parallel=True do not survive the fork of a Pool,
+    # run in a child so that a hang shows up as a timeout
+    script = """
+import numpy as np
+import src.fpeqs as fp
+from src.fpeqs_L2 import var_func_L2
+from src.fpeqs_Huber import var_hat_func_Huber_double_noise
+kwargs = {"delta_small": 0.1, "delta_large": 5.0, "percentage": 0.3, "a": 1.0}
+args = (var_func_L2, var_hat_func_Huber_double_noise, 0.1, 2.0, kwargs)
+serial = fp.multi_start_state_equations(*args, n_starts=8, rng=0)
+pooled = fp.multi_start_state_equations(
+    *args, n_starts=8, rng=0, solver_kwargs={"method": "anderson"}
+)
+assert len(serial[1]) == len(pooled[1]) == 1
+np.testing.assert_allclose(serial[0], pooled[0], atol=1e-7)
+parallel = fp.multi_start_state_equations(*args, n_starts=8, rng=0, parallel=True)
+np.testing.assert_array_equal(parallel[0], serial[0])
+"""
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=300)
+
+
+@pytest.mark.parametrize(
+    "var_func, var_hat_func, var_hat_kwargs",
+    [
+        (var_func_L2, getattr(fpeqs_L2, "var_hat_func_L2_" + noise), L2_NOISES[noise])
+        for noise in L2_NOISES
+    ]
+    + [(var_func_BO, var_hat_func_BO_single_noise, L2_NOISES["single_noise"])],
+)
+@pytest.mark.parametrize("alpha", [0.1, 1.0, 10.0])
+@pytest.mark.parametrize("reg_param", [1e-3, 0.1, 1.0])
+def test_direct_matches_iteration(
+    var_func, var_hat_func, var_hat_kwargs, alpha, reg_param
+):
+    direct, info = fp.state_equations(
+        var_func, var_hat_func, reg_param, alpha, INIT, var_hat_kwargs, full_output=True
+    )
+    assert info["n_iter"] == 0
+    np.testing.assert_allclose(
+        direct,
+        fp.state_equations(
+            var_func, var_hat_func, reg_param, alpha, INIT, var_hat_kwargs, direct=False
+        ),
+        atol=TOL_DIRECT,
+    )
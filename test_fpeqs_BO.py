@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from scipy.integrate import quad
+from src.fpeqs_BO import (
+    var_hat_func_BO_double_noise,
+    var_hat_func_BO_decorrelated_noise,
+)
+
+# run with python -m pytest test_fpeqs_BO.py
+
+TOL_BO = 1e-10
+
+
+def _q_hat_BO_double_noise_reference(q, alpha, delta_small, delta_large, eps):
+    # 1-D quad of (d_omega Zout)^2 / Zout at omega = 0, in logs so that the
+    # tails do not underflow to 0 / 0
+    variance_small, variance_large = 1 - q + delta_small, 1 - q + delta_large
+
+    def integrand(y):
+        log_small = (
+            np.log(1 - eps)
+            - y ** 2 / (2 * variance_small)
+            - np.log(2 * np.pi * variance_small) / 2
+        )
+        log_large = (
+            np.log(eps)
+            - y ** 2 / (2 * variance_large)
+            - np.log(2 * np.pi * variance_large) / 2
+        )
+        log_z_out = np.logaddexp(log_small, log_large)
+        fout = y / variance_small * np.exp(log_small - log_z_out) + (
+            y / variance_large
+        ) * np.exp(log_large - log_z_out)
+        return fout ** 2 * np.exp(log_z_out)
+
+    border = 40 * np.sqrt(variance_large)
+    points = np.sqrt(variance_small) * np.array([-8, -4, -2, -1, 0, 1, 2, 4, 8])
+    integral = quad(
+        integrand,
+        -border,
+        border,
+        points=points,
+        limit=500,
+        epsabs=1e-12,
+        epsrel=1e-12,
+    )[0]
+    return alpha * integral
+
+
+@pytest.mark.parametrize(
+    "q, delta_small, delta_large, eps, expected",
+    [
+        # the dblquad version gave 93.82 here
+        (0.99, 0.01, 100.0, 0.05, 93.94887312004921),
+        (0.5, 0.1, 10.0, 0.3, None),
+    ],
+)
+def test_BO_double_noise(q, delta_small, delta_large, eps, expected):
+    q_hat = var_hat_func_BO_double_noise(
+        0.5, q, 0.5, 2.0, delta_small, delta_large, eps
+    )[0]
+    assert q_hat == pytest.approx(
+        _q_hat_BO_double_noise_reference(q, 2.0, delta_small, delta_large, eps),
+        rel=TOL_BO,
+    )
+    if expected is not None:
+        assert q_hat == pytest.approx(expected, rel=TOL_BO)
+
+
+def test_BO_decorrelated_noise_with_beta_one_is_double_noise():
+    args = (0.5, 0.6, 0.5, 2.0, 0.1, 10.0, 0.3)
+    np.testing.assert_allclose(
+        var_hat_func_BO_decorrelated_noise(*args, 1.0),
+        var_hat_func_BO_double_noise(*args),
+        rtol=1e-8,
+    )
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from src.gufunc_utils import vectorized_channel_func, vectorized_var_hat_func
+from src.fpeqs_L2 import var_func_L2, var_hat_func_L2_decorrelated_noise
+from src.fpeqs_L1 import var_hat_func_L1_double_noise
+from src.fpeqs_Huber import var_hat_func_Huber_double_noise
+
+# run with python -m pytest test_gufunc_utils.py
+
+N_POINTS = 1000
+DOUBLE_NOISE = {"delta_small": 0.1, "delta_large": 5.0, "percentage": 0.3}
+
+
+@pytest.mark.parametrize(
+    "var_hat_func, var_hat_kwargs",
+    [
+        (var_hat_func_L2_decorrelated_noise, dict(DOUBLE_NOISE, beta=0.5)),
+        (var_hat_func_L1_double_noise, DOUBLE_NOISE),
+        (var_hat_func_Huber_double_noise, dict(DOUBLE_NOISE, a=1.0)),
+    ],
+)
+def test_vectorized_var_hat_func_is_bit_compatible(var_hat_func, var_hat_kwargs):
+    rng = np.random.default_rng(0)
+    q = rng.uniform(0.1, 2.0, N_POINTS)
+    m = rng.uniform(-1.0, 1.0, N_POINTS) * np.sqrt(q)
+    sigma = rng.uniform(0.1, 2.0, N_POINTS)
+    alpha = np.exp(rng.uniform(-3.0, 8.0, N_POINTS))
+    scalar = np.array(
+        [var_hat_func(*point, **var_hat_kwargs) for point in zip(m, q, sigma, alpha)]
+    ).T
+    np.testing.assert_array_equal(
+        vectorized_var_hat_func(var_hat_func, m, q, sigma, alpha, var_hat_kwargs),
+        scalar,
+    )
+
+
+def test_vectorized_channel_func_broadcasts():
+    m_hat, q_hat, sigma_hat = np.meshgrid([0.5, 1.0], [0.2, 0.4, 0.6], [1.0])
+    reg_params = np.array([[0.1, 1.0]]).T[:, :, None, None]
+    out = vectorized_channel_func(var_func_L2)(m_hat, q_hat, sigma_hat, reg_params)
+    assert out[0].shape == (2,) + m_hat.shape
+    np.testing.assert_array_equal(
+        out[1][1, 2, 0, 0], var_func_L2(0.5, 0.6, 1.0, 1.0)[1]
+    )
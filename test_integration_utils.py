@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from scipy import LowLevelCallable
+from scipy.integrate import dblquad as scipy_dblquad
+import src.numerical_functions as numfun
+from src.integration_utils import (
+    dblquad,
+    find_integration_borders_square,
+    integration_borders,
+    _borders_cache,
+    _quadpack_integrand,
+)
+
+# run with python -m pytest test_integration_utils.py
+
+M, Q, SIGMA = 0.5, 0.6, 0.8
+DOUBLE_NOISE = (0.1, 5.0, 0.3)
+
+
+@pytest.mark.parametrize(
+    "fun, args",
+    [
+        (numfun.m_integral_L2_single_noise, (Q, M, SIGMA, 1.0)),
+        (numfun.q_integral_L1_double_noise, (Q, M, SIGMA) + DOUBLE_NOISE),
+        (
+            numfun.sigma_integral_Huber_double_noise,
+            (Q, M, SIGMA) + DOUBLE_NOISE + (1.0,),
+        ),
+        (numfun.q_integral_BO_double_noise, (Q, M, SIGMA) + DOUBLE_NOISE),
+    ],
+)
+@pytest.mark.parametrize("scale1", [1.0, np.sqrt(6.0)])
+def test_integration_borders_match_the_scan(fun, args, scale1):
+    assert integration_borders(fun, scale1, 1.0, args=args) == (
+        find_integration_borders_square(fun, scale1, 1.0, args=args)
+    )
+
+
+def test_integration_borders_are_cached():
+    args = (Q, M, SIGMA) + DOUBLE_NOISE + (1.0,)
+    borders = integration_borders(
+        numfun.q_integral_Huber_double_noise, np.sqrt(6.0), 1.0, args=args
+    )
+    n_cached = len(_borders_cache)
+    # a change below the quantisation is served from the cache
+    args = (Q * (1 + 1e-7),) + args[1:]
+    assert (
+        integration_borders(
+            numfun.q_integral_Huber_double_noise, np.sqrt(6.0), 1.0, args=args
+        )
+        == borders
+    )
+    assert len(_borders_cache) == n_cached
+
+
+def test_low_level_dblquad_matches_scipy():
+    args = (Q, M, SIGMA) + DOUBLE_NOISE + (1.0,)
+    assert isinstance(
+        _quadpack_integrand(numfun.m_integral_Huber_double_noise, args),
+        LowLevelCallable,
+    )
+    np.testing.assert_allclose(
+        dblquad(numfun.m_integral_Huber_double_noise, -5.0, 5.0, -8.0, 8.0, args)[0],
+        scipy_dblquad(
+            numfun.m_integral_Huber_double_noise.py_func,
+            -5.0,
+            5.0,
+            -8.0,
+            8.0,
+            args,
+            epsabs=1.49e-8,
+            epsrel=1.49e-8,
+        )[0],
+        rtol=1e-13,
+    )
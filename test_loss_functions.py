@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize_scalar
+from src.loss_functions import (
+    LOSSES,
+    make_proximal,
+    loss_double_quad,
+    Dloss_double_quad,
+    DDloss_double_quad,
+    proximal_loss_double_quad,
+    _proximal_argument_loss_double_quad,
+)
+
+# run with python -m pytest test_loss_functions.py
+
+N_POINTS = 200
+N_SCAN = 20001
+
+
+def brute_force_proximal(y, omega, V, width):
+    # scan of the objective around the quadratic part minimiser, refined by a
+    # bounded Brent around the best point of the scan
+    center = (V * y + omega) / (1 + V)
+    zs = np.linspace(center - 10, center + 10, N_SCAN)
+    best = np.argmin(_proximal_argument_loss_double_quad(zs, y, omega, V, width))
+    result = minimize_scalar(
+        _proximal_argument_loss_double_quad,
+        bounds=(zs[max(best - 1, 0)], zs[min(best + 1, N_SCAN - 1)]),
+        args=(y, omega, V, width),
+        method="bounded",
+        options={"xatol": 1e-12},
+    )
+    return result.x
+
+
+@pytest.mark.parametrize("width", [0.01, 0.5, 10.0])
+@pytest.mark.parametrize("V", [0.1, 1.0, 10.0])
+def test_proximal_matches_brute_force(V, width):
+    rng = np.random.default_rng(0)
+    for y, omega in rng.normal(scale=3.0, size=(N_POINTS, 2)):
+        proximal, _ = proximal_loss_double_quad(y, omega, V, width)
+        reference = brute_force_proximal(y, omega, V, width)
+        function_proximal, function_reference = [
+            _proximal_argument_loss_double_quad(z, y, omega, V, width)
+            for z in (proximal, reference)
+        ]
+        # never a worse objective, and the same point unless two minima tie
+        assert function_proximal <= function_reference + 1e-12
+        if function_reference - function_proximal < 1e-9:
+            assert proximal == pytest.approx(reference, abs=1e-5)
+
+
+@pytest.mark.parametrize("width", [0.01, 0.5, 10.0])
+def test_proximal_derivative_matches_finite_differences(width):
+    V, step = 2.0, 1e-6
+    for y, omega in np.random.default_rng(1).normal(scale=3.0, size=(N_POINTS, 2)):
+        proximal, proximal_derivative = proximal_loss_double_quad(y, omega, V, width)
+        finite_difference = (
+            proximal_loss_double_quad(y, omega + step, V, width)[0]
+            - proximal_loss_double_quad(y, omega - step, V, width)[0]
+        ) / (2 * step)
+        if np.abs(finite_difference) < 10:
+            assert proximal_derivative == pytest.approx(finite_difference, abs=1e-5)
+
+
+def test_registered_l2_proximal_is_the_closed_form():
+    proximal = LOSSES["l2"]["proximal"]
+    assert LOSSES["l2"]["params"] == ()
+    for y, omega in np.random.default_rng(2).normal(scale=3.0, size=(N_POINTS, 2)):
+        for V in [0.1, 1.0, 10.0]:
+            proximal_val, proximal_derivative = proximal(y, omega, V)
+            assert proximal_val == pytest.approx((omega + V * y) / (1 + V), abs=1e-12)
+            assert proximal_derivative == pytest.approx(1 / (1 + V), rel=1e-14)
+
+
+@pytest.mark.parametrize("width", [0.01, 0.5, 10.0])
+def test_generated_double_quad_proximal_is_the_analytic_one(width):
+    assert LOSSES["double_quad"]["params"] == ("width",)
+    proximal = make_proximal(loss_double_quad, Dloss_double_quad, DDloss_double_quad)
+    V = 2.0
+    for y, omega in np.random.default_rng(3).normal(scale=3.0, size=(N_POINTS, 2)):
+        np.testing.assert_allclose(
+            proximal(y, omega, V, width),
+            proximal_loss_double_quad(y, omega, V, width),
+            rtol=1e-9,
+            atol=1e-12,
+        )
@@ -0,0 +1,278 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import src.numerical_functions as numfun
+from src.loss_functions import proximal_loss_double_quad
+import src.fpeqs_L2 as fpeqs_L2
+import src.fpeqs_Huber as fpeqs_Huber
+import src.fpeqs_numerical as fpeqs_numerical
+from src.fpeqs_numerical import var_hat_func_numerical_loss_single_noise
+
+# run with python -m pytest test_numerical_functions.py
+
+M, Q, SIGMA, ALPHA = 0.5, 0.6, 0.8, 1.3
+NOISES = {
+    "single_noise": {"delta": 1.0},
+    "double_noise": {"delta_small": 0.5, "delta_large": 5.0, "percentage": 0.1},
+    "decorrelated_noise": {
+        "delta_small": 0.5,
+        "delta_large": 5.0,
+        "percentage": 0.1,
+        "beta": 0.3,
+    },
+}
+TOL_NUM = 1e-7
+TOL_ROMBERG = 1e-10
+TOL_TABLE = 1e-6
+
+
+def precompute_proximals_L2(
+    x_range, y_range, m, q, sigma, dtype=np.float64, out=None, **kwargs
+):
+    # closed-form proximal of (y - z)^2 / 2, rows are y and columns are xi
+    if out is None:
+        shape = (len(y_range), len(x_range))
+        out = (np.empty(shape, dtype=dtype), np.empty(shape, dtype=dtype))
+    proximals, proximal_derivatives = out
+    proximals[...] = (np.sqrt(q) * x_range + sigma * y_range[:, None]) / (1 + sigma)
+    proximal_derivatives[...] = 1 / (1 + sigma)
+    return proximals, proximal_derivatives
+
+
+@pytest.mark.parametrize("noise", NOISES)
+@pytest.mark.parametrize("integration_backend", ["dblquad", "gauss"])
+@pytest.mark.parametrize("semi_analytic", [False, True])
+def test_num_L2_matches_closed_form(noise, integration_backend, semi_analytic):
+    closed_form = getattr(fpeqs_L2, "var_hat_func_L2_" + noise)
+    num = getattr(fpeqs_L2, "var_hat_func_L2_num_" + noise)
+    np.testing.assert_allclose(
+        num(
+            M,
+            Q,
+            SIGMA,
+            ALPHA,
+            **NOISES[noise],
+            integration_backend=integration_backend,
+            semi_analytic=semi_analytic,
+        ),
+        closed_form(M, Q, SIGMA, ALPHA, **NOISES[noise]),
+        rtol=TOL_NUM,
+    )
+
+
+@pytest.mark.parametrize("integration_backend", ["dblquad", "gauss"])
+def test_fused_Huber_matches_separate_integrals(integration_backend):
+    args = (M, Q, SIGMA, 0.5, 5.0, 0.1, 1.0)
+    np.testing.assert_allclose(
+        numfun.hat_equations_Huber_double_noise(
+            *args, integration_backend=integration_backend
+        ),
+        [
+            numfun.m_hat_equation_Huber_double_noise(
+                *args, integration_backend=integration_backend
+            ),
+            numfun.q_hat_equation_Huber_double_noise(
+                *args, integration_backend=integration_backend
+            ),
+            numfun.sigma_hat_equation_Huber_double_noise(
+                *args, integration_backend=integration_backend
+            ),
+        ],
+        rtol=TOL_NUM,
+    )
+
+
+def test_per_quantity_L2_decorrelated_matches_closed_form():
+    # these used to integrate the double noise integrands with one extra argument
+    args = tuple(NOISES["decorrelated_noise"].values())
+    hat_equations = [
+        numfun.m_hat_equation_L2_decorrelated_noise(M, Q, SIGMA, *args),
+        numfun.q_hat_equation_L2_decorrelated_noise(M, Q, SIGMA, *args),
+        -numfun.sigma_hat_equation_L2_decorrelated_noise(M, Q, SIGMA, *args),
+    ]
+    np.testing.assert_allclose(
+        ALPHA * np.array(hat_equations),
+        fpeqs_L2.var_hat_func_L2_decorrelated_noise(M, Q, SIGMA, ALPHA, *args),
+        rtol=TOL_NUM,
+    )
+
+
+@pytest.mark.parametrize("noise", NOISES)
+def test_semi_analytic_Huber_matches_2d_integrals(noise):
+    var_hat_kwargs = dict(NOISES[noise], a=1.0)
+    num = getattr(fpeqs_Huber, "var_hat_func_Huber_num_" + noise)
+    np.testing.assert_allclose(
+        num(M, Q, SIGMA, ALPHA, **var_hat_kwargs, semi_analytic=True),
+        num(M, Q, SIGMA, ALPHA, **var_hat_kwargs),
+        rtol=TOL_NUM,
+    )
+
+
+@pytest.mark.parametrize("dtype, tol", [(np.float64, TOL_ROMBERG), (np.float32, 1e-6)])
+def test_numerical_loss_L2_matches_closed_form(dtype, tol):
+    # the Romberg grid was transposed once, m_hat came out as -0.43 for 0.556
+    hat_values = var_hat_func_numerical_loss_single_noise(
+        M,
+        Q,
+        SIGMA,
+        1.0,
+        1.0,
+        precompute_proximals_L2,
+        {},
+        grid_context=numfun.numerical_loss_grid_context(1.0, dtype=dtype),
+    )
+    assert hat_values[0] == pytest.approx(0.5555555555555556, rel=tol)
+    np.testing.assert_allclose(
+        hat_values,
+        fpeqs_L2.var_hat_func_L2_single_noise(M, Q, SIGMA, 1.0, 1.0),
+        rtol=tol,
+    )
+
+
+def test_numerical_loss_blocks_fit_in_memory():
+    max_memory = 2 ** 23
+    grid_context = numfun.numerical_loss_grid_context(1.0, max_memory=max_memory)
+    hat_integrals, info = numfun.hat_equations_numerical_loss_single_noise(
+        M,
+        Q,
+        SIGMA,
+        1.0,
+        precompute_proximals_L2,
+        {},
+        grid_context=grid_context,
+        full_output=True,
+    )
+    assert info["peak_memory"] <= max_memory
+    np.testing.assert_allclose(
+        hat_integrals,
+        numfun.hat_equations_numerical_loss_single_noise(
+            M, Q, SIGMA, 1.0, precompute_proximals_L2, {}
+        ),
+        rtol=TOL_ROMBERG,
+    )
+    # the context is reused as it is by the next iterations
+    buffers = grid_context["buffers"]
+    np.testing.assert_array_equal(
+        numfun.hat_equations_numerical_loss_single_noise(
+            M, Q, SIGMA, 1.0, precompute_proximals_L2, {}, grid_context=grid_context
+        ),
+        hat_integrals,
+    )
+    assert grid_context["buffers"] is buffers
+
+
+def test_double_quad_grid_matches_the_scalar_proximal():
+    x_range, y_range = np.linspace(-3.0, 3.0, 7), np.linspace(-4.0, 4.0, 5)
+    proximals, proximal_derivatives = numfun.precompute_proximals_loss_double_quad_grid(
+        x_range, y_range, M, Q, SIGMA, 0.5
+    )
+    for i, y in enumerate(y_range):
+        for j, x in enumerate(x_range):
+            assert (proximals[i, j], proximal_derivatives[i, j]) == (
+                proximal_loss_double_quad(y, np.sqrt(Q) * x, SIGMA, 0.5)
+            )
+
+
+def test_threaded_double_quad_grid_then_pool_exits():
+    # a numba parallel region makes a later fork of a Pool hang, run in a child
+    # so that a hang shows up as a timeout
+    script = """
+import numpy as np
+from multiprocessing import Pool
+import src.numerical_functions as numfun
+args = (np.linspace(-3.0, 3.0, 33), np.linspace(-4.0, 4.0, 17), 0.5, 0.6, 0.8, 0.5)
+serial = numfun.precompute_proximals_loss_double_quad_grid(*args)
+with Pool(2) as pool:
+    pooled = pool.starmap(numfun.precompute_proximals_loss_double_quad_grid, [args])[0]
+threaded = numfun.precompute_proximals_loss_double_quad_grid(*args, n_threads=2)
+np.testing.assert_array_equal(pooled, serial)
+np.testing.assert_array_equal(threaded, serial)
+table = numfun.precompute_proximals_loss_double_quad_table(*args)
+threaded = numfun.precompute_proximals_loss_double_quad_table(*args, n_threads=2)
+np.testing.assert_array_equal(threaded, table)
+registered = numfun.precompute_proximals_grid(*args[:5], "double_quad", width=0.5)
+threaded = numfun.precompute_proximals_grid(
+    *args[:5], "double_quad", n_threads=2, width=0.5
+)
+np.testing.assert_array_equal(registered, serial)
+np.testing.assert_array_equal(threaded, serial)
+"""
+    env = dict(os.environ, NUMBA_NUM_THREADS="2")
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=300, env=env)
+
+
+@pytest.mark.parametrize("width", [0.01, 0.5, 10.0])
+def test_double_quad_table_matches_the_grid(width):
+    x_range, y_range = np.linspace(-10.0, 10.0, 201), np.linspace(-12.0, 12.0, 121)
+    table = numfun.precompute_proximals_loss_double_quad_table(
+        x_range, y_range, M, Q, SIGMA, width
+    )
+    grid = numfun.precompute_proximals_loss_double_quad_grid(
+        x_range, y_range, M, Q, SIGMA, width
+    )
+    for table_values, grid_values in zip(table, grid):
+        np.testing.assert_allclose(
+            table_values, grid_values, rtol=0, atol=1e-8 * (1 + np.max(np.abs(grid[0])))
+        )
+
+
+def test_numerical_loss_table_of_a_wide_double_quad_is_L2():
+    # for a large width the double quad loss is half the square loss
+    hat_values = var_hat_func_numerical_loss_single_noise(
+        M,
+        Q,
+        SIGMA,
+        1.0,
+        1.0,
+        numfun.precompute_proximals_loss_double_quad_table,
+        {"width": 1e8},
+    )
+    assert hat_values[0] == pytest.approx(0.5555555555555556, rel=TOL_TABLE)
+    np.testing.assert_allclose(
+        hat_values,
+        fpeqs_L2.var_hat_func_L2_single_noise(M, Q, SIGMA, 1.0, 1.0),
+        rtol=TOL_TABLE,
+    )
+
+
+@pytest.mark.parametrize("noise", NOISES)
+def test_registered_l2_numerical_loss_matches_closed_form(noise):
+    hat_values = getattr(fpeqs_numerical, "var_hat_func_numerical_loss_" + noise)(
+        M,
+        Q,
+        SIGMA,
+        ALPHA,
+        *NOISES[noise].values(),
+        numfun.precompute_proximals_grid,
+        {"loss_name": "l2"},
+    )
+    np.testing.assert_allclose(
+        hat_values,
+        getattr(fpeqs_L2, "var_hat_func_L2_" + noise)(
+            M, Q, SIGMA, ALPHA, *NOISES[noise].values()
+        ),
+        rtol=TOL_ROMBERG,
+    )
+
+
+def test_registered_wide_double_quad_matches_the_table():
+    loss_args = {"loss_name": "double_quad", "width": 1e8}
+    hat_values = var_hat_func_numerical_loss_single_noise(
+        M, Q, SIGMA, 1.0, 1.0, numfun.precompute_proximals_grid, loss_args
+    )
+    assert hat_values[0] == pytest.approx(0.5555555555555556, rel=TOL_TABLE)
+    np.testing.assert_allclose(
+        hat_values,
+        var_hat_func_numerical_loss_single_noise(
+            M,
+            Q,
+            SIGMA,
+            1.0,
+            1.0,
+            numfun.precompute_proximals_loss_double_quad_table,
+            {"width": 1e8},
+        ),
+        rtol=TOL_TABLE,
+    )